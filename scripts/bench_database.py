@@ -0,0 +1,101 @@
+"""
+数据库写入性能基准测试
+
+对比两种写入方式的 inserts/sec:
+  before: 每次插入新建连接并提交(默认 journal/synchronous, 旧实现的行为)
+  after:  DatabaseManager 的线程长连接 + WAL
+
+用法: python scripts/bench_database.py [插入条数] [线程数]
+"""
+import sys
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from threading import Thread
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.database import DatabaseManager
+
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE device_properties (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        did TEXT NOT NULL,
+        property_name TEXT NOT NULL,
+        property_value TEXT NOT NULL,
+        value_type TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+def insert_legacy(db_path: Path, did: str, name: str, value) -> None:
+    """旧实现: 每条记录一个新连接、一次提交"""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.execute('''
+            INSERT INTO device_properties
+            (did, property_name, property_value, value_type)
+            VALUES (?, ?, ?, ?)
+        ''', (did, name, str(value), type(value).__name__))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_threads(count: int, threads: int, insert_one) -> float:
+    """在多个线程中并发插入, 返回 inserts/sec"""
+    per_thread = count // threads
+
+    def worker(idx: int):
+        for i in range(per_thread):
+            insert_one(f"device-{idx}", 'temperature', 20.0 + i % 10)
+
+    workers = [Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # before: 旧表结构, 默认 journal 模式, 按旧方式逐条连接
+        legacy_path = Path(tmp) / 'legacy.db'
+        conn = sqlite3.connect(str(legacy_path))
+        conn.execute(LEGACY_SCHEMA)
+        conn.commit()
+        conn.close()
+
+        before = run_threads(
+            count, threads,
+            lambda did, name, value: insert_legacy(legacy_path, did, name, value)
+        )
+
+        # after: DatabaseManager
+        db = DatabaseManager(str(Path(tmp) / 'pooled.db'))
+        after = run_threads(count, threads, db.add_device_property)
+        db.close()
+
+    print(json.dumps({
+        'inserts': count,
+        'threads': threads,
+        'before_inserts_per_sec': round(before, 1),
+        'after_inserts_per_sec': round(after, 1),
+        'speedup': round(after / before, 2) if before else None
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+设备配置格式化性能基准测试
+
+对比格式化全部属性值, 以及渲染一次完整仪表盘(所有设备配置的
+get_display_properties)的耗时:
+  before: 旧实现, 每个值都查属性定义、解析 scale、走两段 if/elif 判断单位和属性名
+  after:  加载配置时按属性编译好的格式化函数, 每个值一次字典查找加一次调用
+
+用法: python scripts/bench_profiles.py [渲染次数]
+"""
+import sys
+import json
+import time
+import types
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.device_profiles import DeviceProfileFactory, JsonDeviceProfile
+
+
+def legacy_base_format_value(key, value):
+    """旧实现: DeviceProfile.format_value"""
+    try:
+        if key == 'temperature':
+            return f"{float(value):.1f}°C"
+        elif key in ['relative-humidity', 'battery-level']:
+            return f"{int(float(value))}%"
+        elif key in ['electric-power', 'power']:
+            return f"{float(value):.1f}W"
+        elif key == 'electric-current':
+            return f"{float(value):.2f}A"
+        elif key == 'voltage':
+            return f"{float(value):.1f}V"
+        elif key == 'brightness':
+            return f"{int(float(value))}%"
+        elif key == 'color-temperature':
+            return f"{int(float(value))}K"
+        elif key == 'on':
+            return "开启" if str(value).lower() in ['true', '1', 'on'] else "关闭"
+        elif key == 'mute':
+            return "静音" if str(value).lower() in ['true', '1', 'on'] else "未静音"
+        elif key == 'volume':
+            return f"🔊{int(float(value))}"
+        elif key == 'playing-state':
+            state_map = {0: "⏸暂停", 1: "▶播放中", 2: "⏳缓冲中"}
+            return state_map.get(int(value), str(value))
+        elif key == 'connected-device-count':
+            return f"{int(value)}台设备"
+        else:
+            return str(value)
+    except (ValueError, TypeError):
+        return str(value)
+
+
+def legacy_format_value(self, key, value):
+    """旧实现: JsonDeviceProfile.format_value"""
+    prop_def = self.property_map.get(key)
+    if prop_def:
+        scale = prop_def.get('scale')
+        if scale is not None:
+            try:
+                value = float(value) * float(scale)
+            except (ValueError, TypeError):
+                pass
+
+        unit = prop_def.get('unit', '')
+        try:
+            if unit == 'celsius':
+                return f"{float(value):.1f}°C"
+            elif unit == 'percentage':
+                return f"{int(float(value))}%"
+            elif unit == 'watt':
+                return f"{float(value):.1f}W"
+            elif unit == 'ampere':
+                return f"{float(value):.2f}A"
+            elif unit == 'volt':
+                return f"{float(value):.1f}V"
+            elif unit == 'kelvin':
+                return f"{int(float(value))}K"
+        except (ValueError, TypeError):
+            pass
+
+    return legacy_base_format_value(key, value)
+
+
+def sample_properties(profile: JsonDeviceProfile) -> dict:
+    """按属性定义构造一组最新值"""
+    properties = {}
+    for name, prop in profile.property_map.items():
+        if prop.get('format') == 'bool':
+            value = True
+        elif prop.get('value-list'):
+            value = prop['value-list'][0]['value']
+        elif prop.get('format') == 'string':
+            value = 'text'
+        else:
+            value = 23.456
+        properties[name] = {'value': value, 'value_type': prop.get('format'), 'timestamp': '-'}
+    return properties
+
+
+def format_all(dashboard, rounds: int) -> float:
+    """格式化 rounds 次全部属性值, 返回每次的微秒数"""
+    items = [
+        (profile.format_value, key, data['value'])
+        for profile, properties in dashboard
+        for key, data in properties.items()
+    ]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for format_value, key, value in items:
+            format_value(key, value)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def render(dashboard, rounds: int) -> float:
+    """渲染 rounds 次仪表盘, 返回每次渲染的微秒数"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for profile, properties in dashboard:
+            profile.get_display_properties(properties)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    models = sorted(DeviceProfileFactory.scan())
+    profiles = [DeviceProfileFactory.create_profile(model) for model in models]
+    dashboard = [(profile, sample_properties(profile)) for profile in profiles]
+    values = sum(len(properties) for _, properties in dashboard)
+
+    after_format = format_all(dashboard, rounds)
+    after_render = render(dashboard, rounds)
+
+    # before: 替换为旧的格式化实现
+    for profile in profiles:
+        profile.format_value = types.MethodType(legacy_format_value, profile)
+    before_format = format_all(dashboard, rounds)
+    before_render = render(dashboard, rounds)
+
+    print(json.dumps({
+        'profiles': len(profiles),
+        'values_per_render': values,
+        'rounds': rounds,
+        'before_format_us': round(before_format, 1),
+        'after_format_us': round(after_format, 1),
+        'format_speedup': round(before_format / after_format, 2) if after_format else None,
+        'before_render_us': round(before_render, 1),
+        'after_render_us': round(after_render, 1),
+        'render_speedup': round(before_render / after_render, 2) if after_render else None
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
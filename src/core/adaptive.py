@@ -0,0 +1,190 @@
+"""自适应轮询间隔模块"""
+from threading import Lock
+from typing import Dict, Any, List, Tuple
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 间隔调整原因
+REASON_INITIAL = 'initial'   # 首次采样, 沿用静态间隔
+REASON_ALERT = 'alert'       # 报警规则等待或已触发, 缩短到下限
+REASON_CHANGED = 'changed'   # 值发生变化, 缩短间隔
+REASON_FLAT = 'flat'         # 值未变化, 延长间隔
+REASONS = (REASON_INITIAL, REASON_ALERT, REASON_CHANGED, REASON_FLAT)
+
+
+class AdaptiveIntervals:
+    """
+    按观测到的变化率调整每个设备的轮询间隔
+    
+    值变化时按 shrink 缩短、未变化时按 grow 延长, 间隔限定在 [min_interval, max_interval];
+    静态间隔低于 min_interval 的设备(用户自定义的短间隔)以静态间隔为下限.
+    报警规则处于等待或触发状态的设备直接缩短到下限.
+    所有设备的总轮询频率超过 budget(次/分钟)时, 按比例统一放大有效间隔
+    """
+    
+    def __init__(
+        self,
+        min_interval: float = 30,
+        max_interval: float = 900,
+        budget: float = 0,
+        shrink: float = 0.5,
+        grow: float = 1.25,
+        tolerance: float = 0.01
+    ):
+        """
+        Args:
+            min_interval: 间隔下限(秒)
+            max_interval: 间隔上限(秒)
+            budget: 总轮询频率上限(设备次/分钟), 0 表示不限制
+            shrink: 值变化时的间隔缩放系数(<1)
+            grow: 值未变化时的间隔缩放系数(>1)
+            tolerance: 数值的相对变化阈值, 零值附近按同样大小的绝对值判断
+        """
+        self.min_interval = max(1.0, float(min_interval))
+        self.max_interval = max(self.min_interval, float(max_interval))
+        self.budget = max(0.0, float(budget))
+        self.shrink = min(max(float(shrink), 0.01), 1.0)
+        self.grow = max(float(grow), 1.0)
+        self.tolerance = max(0.0, float(tolerance))
+        
+        self._states: Dict[str, Dict[str, Any]] = {}  # did -> {interval, floor, values, reason}
+        self._rate = 0.0  # 按自适应间隔计算的总轮询频率(次/分钟)
+        self._decisions: Dict[str, int] = dict.fromkeys(REASONS, 0)
+        self._lock = Lock()
+    
+    def _clamp(self, interval: float, floor: float) -> float:
+        return min(max(float(interval), floor), self.max_interval)
+    
+    def _state(self, did: str, base: float) -> Dict[str, Any]:
+        """获取设备状态, 首次出现时以静态间隔为起点(调用方需持有锁)"""
+        state = self._states.get(did)
+        if state is None:
+            floor = max(1.0, min(self.min_interval, float(base)))
+            interval = self._clamp(base, floor)
+            state = self._states[did] = {
+                'interval': interval, 'floor': floor, 'values': None, 'reason': REASON_INITIAL
+            }
+            self._rate += 60.0 / interval
+        return state
+    
+    def _scale(self) -> float:
+        """超出预算时有效间隔的放大倍数(调用方需持有锁)"""
+        if self.budget and self._rate > self.budget:
+            return self._rate / self.budget
+        return 1.0
+    
+    def get_interval(self, did: str, base: float) -> int:
+        """
+        获取设备的有效轮询间隔
+        
+        Args:
+            did: 设备ID
+            base: 静态配置的间隔, 作为首次采样前的起点
+        """
+        with self._lock:
+            state = self._state(did, base)
+            return int(round(state['interval'] * self._scale()))
+    
+    def observe(
+        self,
+        did: str,
+        base: float,
+        properties: Dict[str, Any],
+        urgent: bool = False
+    ) -> Tuple[int, int]:
+        """
+        用一次成功的轮询结果调整设备的间隔
+        
+        Args:
+            did: 设备ID
+            base: 静态配置的间隔
+            properties: 属性名 -> 值
+            urgent: 报警规则是否处于等待或触发状态
+        
+        Returns:
+            (调整前的有效间隔, 调整后的有效间隔)
+        """
+        with self._lock:
+            state = self._state(did, base)
+            scale = self._scale()
+            before = state['interval'] * scale
+            
+            previous = state['values']
+            state['values'] = dict(properties)
+            
+            interval, floor = state['interval'], state['floor']
+            if urgent:
+                interval, reason = floor, REASON_ALERT
+            elif previous is None:
+                reason = REASON_INITIAL
+            elif self._changed(previous, properties):
+                interval, reason = self._clamp(interval * self.shrink, floor), REASON_CHANGED
+            else:
+                interval, reason = self._clamp(interval * self.grow, floor), REASON_FLAT
+            
+            self._rate += 60.0 / interval - 60.0 / state['interval']
+            state['interval'] = interval
+            state['reason'] = reason
+            self._decisions[reason] += 1
+            
+            return int(round(before)), int(round(interval * self._scale()))
+    
+    def _changed(self, previous: Dict[str, Any], current: Dict[str, Any]) -> bool:
+        """任一属性的变化超过阈值即视为变化"""
+        for key, value in current.items():
+            if key not in previous:
+                return True
+            last = previous[key]
+            try:
+                delta = abs(float(value) - float(last))
+            except (ValueError, TypeError):
+                if value != last:
+                    return True
+                continue
+            if delta > max(self.tolerance * abs(float(last)), self.tolerance):
+                return True
+        return False
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """自适应调度统计: 总轮询频率、预算缩放倍数、上下限设备数与各原因的调整次数"""
+        with self._lock:
+            states = list(self._states.values())
+            intervals = [state['interval'] for state in states]
+            scale = self._scale()
+            return {
+                'devices': len(states),
+                'rate_per_minute': round(self._rate, 2),
+                'effective_rate_per_minute': round(self._rate / scale, 2),
+                'budget': self.budget,
+                'budget_scale': round(scale, 2),
+                'at_floor': sum(1 for state in states if state['interval'] <= state['floor']),
+                'at_ceiling': sum(1 for interval in intervals if interval >= self.max_interval),
+                'decisions': dict(self._decisions)
+            }
+    
+    def get_decisions(self) -> List[Dict[str, Any]]:
+        """各设备当前的间隔与最近一次调整原因"""
+        with self._lock:
+            scale = self._scale()
+            return [
+                {
+                    'did': did,
+                    'interval': int(round(state['interval'])),
+                    'effective': int(round(state['interval'] * scale)),
+                    'reason': state['reason']
+                }
+                for did, state in self._states.items()
+            ]
+    
+    def reset(self, did: str = None) -> None:
+        """清除设备的自适应状态, 下次从静态间隔重新开始"""
+        with self._lock:
+            if did is None:
+                self._states.clear()
+                self._rate = 0.0
+            else:
+                state = self._states.pop(did, None)
+                if state is not None:
+                    self._rate -= 60.0 / state['interval']
@@ -0,0 +1,287 @@
+"""属性报警规则引擎模块"""
+import operator
+from threading import Lock
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+from .database import DatabaseManager
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 报警状态: 正常 / 条件已满足但未达到持续时间 / 已触发
+STATE_OK = 'ok'
+STATE_PENDING = 'pending'
+STATE_FIRING = 'firing'
+
+# 报警事件: 触发 / 恢复
+EVENT_FIRED = 'fired'
+EVENT_RESOLVED = 'resolved'
+
+ALERT_TYPE = 'property_alert'
+
+CONDITIONS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq
+}
+
+
+def _clear_predicate(condition: str, threshold: float, hysteresis: float) -> Callable[[float], bool]:
+    """
+    生成恢复条件: 值需要越过阈值再退回 hysteresis 才算恢复,
+    避免在阈值附近波动时反复触发
+    """
+    if condition == '>':
+        return lambda value: value <= threshold - hysteresis
+    if condition == '>=':
+        return lambda value: value < threshold - hysteresis
+    if condition == '<':
+        return lambda value: value >= threshold + hysteresis
+    if condition == '<=':
+        return lambda value: value > threshold + hysteresis
+    return lambda value: value != threshold
+
+
+def compile_rule(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    校验并编译一条报警规则
+    
+    Args:
+        raw: {name, device_type, property, condition, threshold, hysteresis, duration, severity, enabled}
+    
+    Returns:
+        编译后的规则; 未启用或配置无效时返回None
+    """
+    if not raw.get('enabled', True):
+        return None
+    
+    condition = raw.get('condition')
+    compare = CONDITIONS.get(condition)
+    if compare is None:
+        logger.warning(f"报警规则 {raw.get('name')} 的条件 {condition} 无效, 已忽略")
+        return None
+    
+    try:
+        threshold = float(raw['threshold'])
+        hysteresis = abs(float(raw.get('hysteresis') or 0))
+        duration = max(0.0, float(raw.get('duration') or 0))
+    except (KeyError, ValueError, TypeError):
+        logger.warning(f"报警规则 {raw.get('name')} 的阈值配置无效, 已忽略")
+        return None
+    
+    if not raw.get('device_type') or not raw.get('property'):
+        logger.warning(f"报警规则 {raw.get('name')} 缺少 device_type 或 property, 已忽略")
+        return None
+    
+    return {
+        'name': raw.get('name') or f"{raw['property']} {condition} {raw['threshold']}",
+        'device_type': raw['device_type'],
+        'property': raw['property'],
+        'condition': condition,
+        'threshold': threshold,
+        'hysteresis': hysteresis,
+        'duration': duration,  # 条件持续满足多少秒后才触发, 0 表示立即触发
+        'severity': raw.get('severity', 'WARNING'),
+        'trigger': lambda value: compare(value, threshold),
+        'clear': _clear_predicate(condition, threshold, hysteresis),
+        'raw': raw
+    }
+
+
+class AlertEngine:
+    """
+    属性报警规则引擎
+    
+    规则在加载时编译, 按 (设备类型, 属性名) 建立索引; 每个 (规则, 设备) 维护一个状态机:
+    正常 -> 等待(条件满足但未达到持续时间) -> 触发 -> 越过回差后恢复
+    只有触发和恢复两种状态转换会写入数据库, 条件持续满足期间不会重复报警
+    """
+    
+    def __init__(self, database: DatabaseManager, rules: List[Dict[str, Any]] = None):
+        self.database = database
+        self._index: Dict[str, Dict[str, List[Tuple[int, Dict[str, Any]]]]] = {}  # 设备类型 -> {属性名: [(规则ID, 规则)]}
+        self._states: Dict[Tuple[int, str], Dict[str, Any]] = {}  # (规则ID, did) -> 状态
+        self._restored: Optional[Dict[Tuple[str, str], int]] = None  # (did, 标题) -> 未解决的报警ID
+        self._lock = Lock()
+        
+        self.load_rules(rules or [])
+    
+    @property
+    def rule_count(self) -> int:
+        return sum(len(rules) for by_property in self._index.values() for rules in by_property.values())
+    
+    def load_rules(self, rules: List[Dict[str, Any]]) -> None:
+        """编译并索引报警规则, 清除全部状态"""
+        index = {}
+        for rule_id, raw in enumerate(rules):
+            rule = compile_rule(raw)
+            if rule:
+                index.setdefault(rule['device_type'], {}).setdefault(rule['property'], []).append((rule_id, rule))
+        
+        with self._lock:
+            self._index = index
+            self._states.clear()
+            self._restored = None
+        
+        logger.info(f"已加载 {self.rule_count} 条报警规则")
+    
+    def evaluate(
+        self,
+        did: str,
+        device_type: str,
+        device_info: Dict[str, Any],
+        properties: Dict[str, Any],
+        now: float
+    ) -> List[Dict[str, Any]]:
+        """
+        用一次采样推进相关规则的状态机
+        
+        Args:
+            did: 设备ID
+            device_type: 设备类型
+            device_info: 设备信息
+            properties: 属性名 -> 值
+            now: 采样时间(Unix时间戳)
+        
+        Returns:
+            本次发生的报警事件 [{event, did, device, rule, property, value, alert_id}, ...]
+        """
+        by_property = self._index.get(device_type)
+        if not by_property:
+            return []
+        
+        transitions = []
+        with self._lock:
+            for prop_name, rules in by_property.items():
+                if prop_name not in properties:
+                    continue
+                try:
+                    value = float(properties[prop_name])
+                except (ValueError, TypeError):
+                    continue
+                
+                for rule_id, rule in rules:
+                    event = self._advance(rule_id, rule, did, device_info, value, now)
+                    if event:
+                        transitions.append((event, rule_id, rule, prop_name, properties[prop_name]))
+        
+        # 数据库写入在锁外进行, 只有状态转换才会到达这里
+        events = []
+        for event, rule_id, rule, prop_name, value in transitions:
+            alert_id = self._record(event, rule_id, rule, did, device_info, prop_name, value)
+            events.append({
+                'event': event,
+                'did': did,
+                'device': device_info,
+                'rule': rule['raw'],
+                'property': prop_name,
+                'value': value,
+                'alert_id': alert_id
+            })
+        return events
+    
+    def is_engaged(self, did: str, device_type: str) -> bool:
+        """设备是否有报警规则处于等待或触发状态"""
+        by_property = self._index.get(device_type)
+        if not by_property:
+            return False
+        
+        with self._lock:
+            for rules in by_property.values():
+                for rule_id, _ in rules:
+                    state = self._states.get((rule_id, did))
+                    if state is not None and state['state'] != STATE_OK:
+                        return True
+        return False
+    
+    def _advance(
+        self,
+        rule_id: int,
+        rule: Dict[str, Any],
+        did: str,
+        device_info: Dict[str, Any],
+        value: float,
+        now: float
+    ) -> Optional[str]:
+        """推进一个 (规则, 设备) 的状态机, 返回发生的事件"""
+        key = (rule_id, did)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = self._initial_state(rule, did, device_info)
+        
+        if state['state'] == STATE_FIRING:
+            if rule['clear'](value):
+                state.update(state=STATE_OK, since=now)
+                return EVENT_RESOLVED
+            return None
+        
+        if not rule['trigger'](value):
+            if state['state'] == STATE_PENDING:
+                state.update(state=STATE_OK, since=now)
+            return None
+        
+        if state['state'] == STATE_OK:
+            state.update(state=STATE_PENDING, since=now)
+        
+        if now - state['since'] >= rule['duration']:
+            state.update(state=STATE_FIRING, since=now, alert_id=None)
+            return EVENT_FIRED
+        return None
+    
+    def _initial_state(self, rule: Dict[str, Any], did: str, device_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        创建状态机初始状态
+        
+        重启前触发且尚未解决的报警恢复为触发状态, 条件仍满足时不会重复报警
+        """
+        if self._restored is None:
+            self._restored = {}
+            try:
+                for alert in self.database.get_unresolved_alerts():
+                    if alert['alert_type'] == ALERT_TYPE:
+                        self._restored[(alert['did'], alert['title'])] = alert['id']
+            except Exception as e:
+                logger.error(f"读取未解决的报警失败: {e}")
+        
+        alert_id = self._restored.pop((did, self._title(rule, device_info)), None)
+        if alert_id is not None:
+            return {'state': STATE_FIRING, 'since': 0.0, 'alert_id': alert_id}
+        return {'state': STATE_OK, 'since': 0.0, 'alert_id': None}
+    
+    @staticmethod
+    def _title(rule: Dict[str, Any], device_info: Dict[str, Any]) -> str:
+        return f"{device_info.get('name')} - {rule['name']}"
+    
+    def _record(
+        self,
+        event: str,
+        rule_id: int,
+        rule: Dict[str, Any],
+        did: str,
+        device_info: Dict[str, Any],
+        prop_name: str,
+        value: Any
+    ) -> Optional[int]:
+        """将状态转换写入数据库, 返回报警ID"""
+        key = (rule_id, did)
+        
+        if event == EVENT_FIRED:
+            alert_id = self.database.add_alert(
+                did, ALERT_TYPE, self._title(rule, device_info),
+                f"属性 {prop_name} 的值为 {value}, 触发条件: {rule['condition']} {rule['raw'].get('threshold')}",
+                rule['severity']
+            )
+            with self._lock:
+                state = self._states.get(key)
+                if state is not None and state['state'] == STATE_FIRING:
+                    state['alert_id'] = alert_id
+            return alert_id
+        
+        with self._lock:
+            state = self._states.get(key)
+            alert_id = state.pop('alert_id', None) if state is not None else None
+        if alert_id is not None:
+            self.database.resolve_alert(alert_id)
+        return alert_id
@@ -0,0 +1,143 @@
+"""设备在线状态跟踪模块"""
+from collections import deque
+from threading import Lock
+from typing import Dict, Any, Optional
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 在线状态转换事件
+EVENT_ONLINE = 'online'
+EVENT_OFFLINE = 'offline'
+
+
+class AvailabilityTracker:
+    """
+    按轮询结果维护设备在线状态的状态机
+    
+    连续失败达到 failure_threshold 次才判定离线, 一次成功即恢复在线;
+    flap_window 秒内状态切换达到 flap_limit 次视为抖动, 抖动期间需连续成功
+    flap_recovery 次才恢复在线. 只有状态转换时返回事件, 由调用方写库和通知.
+    首次确定为在线时不返回事件; 首次确定为离线(启动时设备已离线)仍返回离线事件,
+    以便写入离线状态
+    """
+    
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        flap_window: float = 3600,
+        flap_limit: int = 4,
+        flap_recovery: int = 3
+    ):
+        """
+        Args:
+            failure_threshold: 判定离线所需的连续失败次数
+            flap_window: 抖动检测的时间窗口(秒)
+            flap_limit: 窗口内达到该切换次数视为抖动
+            flap_recovery: 抖动期间恢复在线所需的连续成功次数
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.flap_window = float(flap_window)
+        self.flap_limit = max(2, int(flap_limit))
+        self.flap_recovery = max(1, int(flap_recovery))
+        
+        self._states: Dict[str, Dict[str, Any]] = {}  # did -> 状态
+        self._lock = Lock()
+    
+    def _state(self, did: str) -> Dict[str, Any]:
+        """获取设备状态(调用方需持有锁)"""
+        state = self._states.get(did)
+        if state is None:
+            state = self._states[did] = {
+                'online': None,        # None 表示尚未确定
+                'failures': 0,         # 连续失败次数
+                'successes': 0,        # 连续成功次数
+                'last_success': None,
+                'last_failure': None,
+                'changed_at': None,
+                'transitions': deque()  # 窗口内的状态切换时间
+            }
+        return state
+    
+    def _is_flapping(self, state: Dict[str, Any], now: float) -> bool:
+        """清除窗口外的切换记录, 判断是否处于抖动状态(调用方需持有锁)"""
+        transitions = state['transitions']
+        while transitions and now - transitions[0] > self.flap_window:
+            transitions.popleft()
+        return len(transitions) >= self.flap_limit
+    
+    def _transition(self, state: Dict[str, Any], online: bool, now: float) -> None:
+        """切换在线状态(调用方需持有锁); 从未确定状态首次确定不计入抖动"""
+        if state['online'] is not None:
+            state['transitions'].append(now)
+        state['online'] = online
+        state['changed_at'] = now
+    
+    def record_success(self, did: str, now: float) -> Optional[str]:
+        """
+        记录一次成功轮询
+        
+        Returns:
+            从离线恢复在线时返回 EVENT_ONLINE, 否则返回None
+        """
+        with self._lock:
+            state = self._state(did)
+            state['failures'] = 0
+            state['successes'] += 1
+            state['last_success'] = now
+            
+            if state['online'] is None:
+                self._transition(state, True, now)
+                return None
+            if state['online']:
+                return None
+            
+            if self._is_flapping(state, now) and state['successes'] < self.flap_recovery:
+                return None
+            
+            self._transition(state, True, now)
+            return EVENT_ONLINE
+    
+    def record_failure(self, did: str, now: float) -> Optional[str]:
+        """
+        记录一次失败轮询(请求异常或未返回任何属性)
+        
+        Returns:
+            连续失败达到阈值而判定离线时返回 EVENT_OFFLINE, 否则返回None
+        """
+        with self._lock:
+            state = self._state(did)
+            state['successes'] = 0
+            state['failures'] += 1
+            state['last_failure'] = now
+            
+            if state['online'] is False or state['failures'] < self.failure_threshold:
+                return None
+            
+            self._transition(state, False, now)
+            return EVENT_OFFLINE
+    
+    def consecutive_failures(self, did: str) -> int:
+        """连续失败次数, 供调度器对离线设备退避"""
+        state = self._states.get(did)
+        return state['failures'] if state else 0
+    
+    def get_summary(self) -> Dict[str, int]:
+        """各状态的设备数量"""
+        with self._lock:
+            states = list(self._states.values())
+        return {
+            'online': sum(1 for state in states if state['online'] is True),
+            'offline': sum(1 for state in states if state['online'] is False),
+            'unknown': sum(1 for state in states if state['online'] is None),
+            'failing': sum(1 for state in states if state['failures'] > 0)
+        }
+    
+    def reset(self, did: str = None) -> None:
+        """清除设备状态, 重新登录或设备列表变化后调用"""
+        with self._lock:
+            if did is None:
+                self._states.clear()
+            else:
+                self._states.pop(did, None)
@@ -1,15 +1,103 @@
 """数据库管理模块"""
+import calendar
 import sqlite3
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from contextlib import contextmanager
 import json
 
+import numpy as np
+
+from .downsample import downsample
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 等待数据库锁的最长时间(秒)
+BUSY_TIMEOUT = 10.0
+
+# 每个连接缓存的预编译语句数量
+CACHED_STATEMENTS = 256
+
+# 按属性格式(MIoT spec 或设备配置中的 format)选择数值的存储类型
+INTEGER_FORMATS = {
+    'bool', 'int', 'uint',
+    'int8', 'int16', 'int32', 'int64',
+    'uint8', 'uint16', 'uint32', 'uint64'
+}
+REAL_FORMATS = {'float', 'double'}
+
+INSERT_PROPERTY_SAMPLE = '''
+    INSERT INTO device_properties (series_id, value, value_text, ts)
+    VALUES (?, ?, ?, ?)
+'''
+
+# 最新属性值表的写入语句: 只接受不早于当前记录的采样
+UPSERT_LATEST_PROPERTY = '''
+    INSERT INTO device_properties_latest (series_id, value, value_text, timestamp)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(series_id) DO UPDATE SET
+        value = excluded.value,
+        value_text = excluded.value_text,
+        timestamp = excluded.timestamp
+    WHERE excluded.timestamp >= device_properties_latest.timestamp
+'''
+
+# 汇总层级: 名称 -> 时间桶长度(秒), 每个数值属性在各层级按时间桶保存 min/max/sum/count/last
+ROLLUP_TIERS = {'1m': 60, '15m': 900, '1h': 3600}
+
+UPSERT_ROLLUP = '''
+    INSERT INTO property_rollups
+    (series_id, resolution, bucket, value_min, value_max, value_sum, sample_count, value_last)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(series_id, resolution, bucket) DO UPDATE SET
+        value_min = MIN(property_rollups.value_min, excluded.value_min),
+        value_max = MAX(property_rollups.value_max, excluded.value_max),
+        value_sum = property_rollups.value_sum + excluded.value_sum,
+        sample_count = property_rollups.sample_count + excluded.sample_count,
+        value_last = excluded.value_last
+'''
+
+# 统计计数器: 名称 -> 校准用的计数查询
+# 设备与报警计数由触发器维护; 状态与属性历史写入量大, 由写入路径在同一事务中累加
+STATS_COUNTERS = {
+    'total_devices': 'SELECT COUNT(*) FROM devices',
+    'online_devices': 'SELECT COUNT(*) FROM devices WHERE online = 1',
+    'total_status_records': 'SELECT COUNT(*) FROM device_status',
+    'total_property_records': 'SELECT COUNT(*) FROM device_properties',
+    'unresolved_alerts': 'SELECT COUNT(*) FROM alerts WHERE resolved = 0'
+}
+
+
+def utc_timestamp() -> str:
+    """当前UTC时间, 格式与 CURRENT_TIMESTAMP 一致"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def utc_epoch(value) -> int:
+    """将UTC时间字符串或datetime(无时区信息时视为UTC)转换为Unix时间戳"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return int(value.timestamp())
+        return calendar.timegm(value.timetuple())
+    return calendar.timegm(time.strptime(value[:19], '%Y-%m-%d %H:%M:%S'))
+
+
+def utc_text(epoch: float) -> str:
+    """将Unix时间戳转换为与存储格式一致的UTC时间字符串"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(epoch))
+
+
+def _fetch_xy(cursor: sqlite3.Cursor) -> Tuple[np.ndarray, np.ndarray]:
+    """将 (时间戳, 值) 两列的查询结果读入数组"""
+    # 以元组读取, 由 numpy 一次性转换, 不逐行构造 sqlite3.Row
+    cursor.row_factory = None
+    data = np.array(cursor.fetchall(), dtype=float).reshape(-1, 2)
+    return data[:, 0], data[:, 1]
+
 
 class DatabaseManager:
     """SQLite数据库管理类"""
@@ -23,133 +111,517 @@ class DatabaseManager:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # 每个线程复用一个长连接, 避免每次操作重新打开数据库
+        self._local = threading.local()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}  # 所属线程 -> 连接
+        self._connections_lock = threading.Lock()
+        
+        # 属性序列字典缓存: (did, 属性名) -> (序列ID, 值类型)
+        self._series: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        self._series_lock = threading.Lock()
+        
+        # 统计计数器的内存镜像, 每次修改计数器的事务提交后从 stats_counters 表重新读取
+        self._counters: Dict[str, int] = dict.fromkeys(STATS_COUNTERS, 0)
+        self._counters_lock = threading.Lock()
+        
         self._init_database()
     
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建并配置一个新的数据库连接"""
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=BUSY_TIMEOUT,
+            check_same_thread=False,  # 由 close() 在其他线程统一关闭
+            cached_statements=CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row  # 支持字典式访问
+        
+        # WAL模式下读写互不阻塞; NORMAL同步级别在WAL下仍可保证数据库一致性
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(BUSY_TIMEOUT * 1000)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        
+        with self._connections_lock:
+            # 关闭已退出线程遗留的连接, 避免监控反复启停后文件句柄和WAL读取状态累积
+            for thread in [thread for thread in self._connections if not thread.is_alive()]:
+                self._close_connection(self._connections.pop(thread))
+            self._connections[threading.current_thread()] = conn
+        
+        return conn
+    
+    @staticmethod
+    def _close_connection(conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except Exception as e:
+            logger.warning(f"关闭数据库连接失败: {e}")
+    
     @contextmanager
     def get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row  # 支持字典式访问
+        """
+        获取数据库连接的上下文管理器
+        
+        每个线程使用自己的长连接; 嵌套使用时只由最外层提交或回滚
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.counters_changed = False
+        
+        self._local.depth += 1
         try:
             yield conn
-            conn.commit()
+            if self._local.depth == 1:
+                conn.commit()
+                if self._local.counters_changed:
+                    self._local.counters_changed = False
+                    self._load_counters(conn)
         except Exception as e:
-            conn.rollback()
+            if self._local.depth == 1:
+                conn.rollback()
+                self._local.counters_changed = False
+                # 回滚可能撤销了新建的属性序列, 缓存的序列ID不再可信
+                with self._series_lock:
+                    self._series.clear()
             logger.error(f"数据库操作失败: {e}")
             raise
         finally:
-            conn.close()
+            self._local.depth -= 1
+    
+    def close(self) -> None:
+        """关闭所有线程的数据库连接"""
+        with self._connections_lock:
+            connections = list(self._connections.values())
+            self._connections = {}
+        
+        for conn in connections:
+            self._close_connection(conn)
+        
+        # 当前线程的连接已关闭, 下次使用时重新创建
+        self._local = threading.local()
     
     def _init_database(self) -> None:
         """初始化数据库表结构"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 设备表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS devices (
-                    did TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    model TEXT NOT NULL,
-                    room_name TEXT,
-                    home_id TEXT,
-                    device_type TEXT,
-                    online BOOLEAN DEFAULT 1,
-                    enabled BOOLEAN DEFAULT 1,
-                    monitor_interval INTEGER DEFAULT 60,
-                    properties TEXT,
-                    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 设备状态历史表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS device_status (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    did TEXT NOT NULL,
-                    status_data TEXT NOT NULL,
-                    online BOOLEAN DEFAULT 1,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (did) REFERENCES devices(did)
-                )
-            ''')
+            # 版本0为初始表结构, 之后的结构变化均由迁移完成
+            if conn.execute('PRAGMA user_version').fetchone()[0] == 0:
+                self._create_base_schema(conn.cursor())
             
-            # 设备属性历史表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS device_properties (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    did TEXT NOT NULL,
-                    property_name TEXT NOT NULL,
-                    property_value TEXT NOT NULL,
-                    value_type TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (did) REFERENCES devices(did)
-                )
-            ''')
-            
-            # 报警记录表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS alerts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    did TEXT NOT NULL,
-                    alert_type TEXT NOT NULL,
-                    severity TEXT DEFAULT 'INFO',
-                    title TEXT NOT NULL,
-                    message TEXT,
-                    resolved BOOLEAN DEFAULT 0,
-                    resolved_at TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (did) REFERENCES devices(did)
-                )
-            ''')
+            self._apply_migrations(conn)
+            self._load_counters(conn)
             
-            # 监控配置表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS monitor_config (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    did TEXT NOT NULL,
-                    property_name TEXT NOT NULL,
-                    enabled BOOLEAN DEFAULT 1,
-                    alert_enabled BOOLEAN DEFAULT 0,
-                    alert_condition TEXT,
-                    alert_threshold REAL,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (did) REFERENCES devices(did),
-                    UNIQUE(did, property_name)
-                )
-            ''')
+            logger.info("数据库初始化完成")
+    
+    @staticmethod
+    def _create_base_schema(cursor: sqlite3.Cursor) -> None:
+        """创建初始(版本0)表结构"""
+        # 设备表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS devices (
+                did TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                model TEXT NOT NULL,
+                room_name TEXT,
+                home_id TEXT,
+                device_type TEXT,
+                online BOOLEAN DEFAULT 1,
+                enabled BOOLEAN DEFAULT 1,
+                monitor_interval INTEGER DEFAULT 60,
+                properties TEXT,
+                first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # 设备状态历史表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS device_status (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                did TEXT NOT NULL,
+                status_data TEXT NOT NULL,
+                online BOOLEAN DEFAULT 1,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (did) REFERENCES devices(did)
+            )
+        ''')
+        
+        # 设备属性历史表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS device_properties (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                did TEXT NOT NULL,
+                property_name TEXT NOT NULL,
+                property_value TEXT NOT NULL,
+                value_type TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (did) REFERENCES devices(did)
+            )
+        ''')
+        
+        # 报警记录表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                did TEXT NOT NULL,
+                alert_type TEXT NOT NULL,
+                severity TEXT DEFAULT 'INFO',
+                title TEXT NOT NULL,
+                message TEXT,
+                resolved BOOLEAN DEFAULT 0,
+                resolved_at TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (did) REFERENCES devices(did)
+            )
+        ''')
+        
+        # 监控配置表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS monitor_config (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                did TEXT NOT NULL,
+                property_name TEXT NOT NULL,
+                enabled BOOLEAN DEFAULT 1,
+                alert_enabled BOOLEAN DEFAULT 0,
+                alert_condition TEXT,
+                alert_threshold REAL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (did) REFERENCES devices(did),
+                UNIQUE(did, property_name)
+            )
+        ''')
+        
+        # 系统日志表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS system_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                level TEXT NOT NULL,
+                module TEXT,
+                message TEXT NOT NULL,
+                extra_data TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # 创建索引
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_device_status_did_timestamp 
+            ON device_status(did, timestamp DESC)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_device_properties_did_timestamp 
+            ON device_properties(did, property_name, timestamp DESC)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_alerts_did_created 
+            ON alerts(did, created_at DESC)
+        ''')
+    
+    def _apply_migrations(self, conn: sqlite3.Connection) -> None:
+        """
+        按 PRAGMA user_version 依次执行尚未应用的结构迁移
+        
+        每个迁移与版本号更新在同一事务中完成, 失败时整体回滚
+        """
+        migrations = [
+            self._migrate_latest_properties,  # 版本1
+            self._migrate_typed_samples,      # 版本2
+            self._migrate_rollups,            # 版本3
+            self._migrate_epoch_timestamps,   # 版本4
+            self._migrate_stats_counters,     # 版本5
+        ]
+        
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for target in range(version + 1, len(migrations) + 1):
+            migrate = migrations[target - 1]
+            logger.info(f"升级数据库结构到版本 {target}: {migrate.__doc__.strip()}")
             
-            # 系统日志表
+            if conn.in_transaction:
+                conn.commit()
+            try:
+                conn.execute('BEGIN')
+                migrate(conn.cursor())
+                conn.execute(f'PRAGMA user_version = {target}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    
+    @staticmethod
+    def _migrate_latest_properties(cursor: sqlite3.Cursor) -> None:
+        """创建最新属性值表并从历史记录回填"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS device_properties_latest (
+                did TEXT NOT NULL,
+                property_name TEXT NOT NULL,
+                property_value TEXT NOT NULL,
+                value_type TEXT,
+                timestamp TIMESTAMP NOT NULL,
+                PRIMARY KEY (did, property_name)
+            ) WITHOUT ROWID
+        ''')
+        
+        # 时间戳相同(同一秒内多次写入)时取最后写入的一行
+        cursor.execute('''
+            INSERT OR REPLACE INTO device_properties_latest
+            (did, property_name, property_value, value_type, timestamp)
+            SELECT did, property_name, property_value, value_type, timestamp
+            FROM (
+                SELECT did, property_name, property_value, value_type, timestamp,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY did, property_name ORDER BY timestamp DESC, id DESC
+                       ) AS row_num
+                FROM device_properties
+            )
+            WHERE row_num = 1
+        ''')
+    
+    @staticmethod
+    def _migrate_typed_samples(cursor: sqlite3.Cursor) -> None:
+        """属性历史改为按序列字典编码的数值存储"""
+        # 属性序列字典: 每个 (did, 属性名) 只存一次
+        cursor.execute('''
+            CREATE TABLE property_series (
+                id INTEGER PRIMARY KEY,
+                did TEXT NOT NULL,
+                property_name TEXT NOT NULL,
+                value_type TEXT,
+                UNIQUE(did, property_name)
+            )
+        ''')
+        
+        # 最新值表由历史回填而来, 包含全部序列
+        cursor.execute('''
+            INSERT INTO property_series (did, property_name, value_type)
+            SELECT did, property_name, value_type
+            FROM device_properties_latest
+            ORDER BY did, property_name
+        ''')
+        
+        # value 列不声明类型(无类型亲和性), 按写入时的 INTEGER/REAL 原样保存;
+        # 非数值属性存入 value_text
+        cursor.execute('''
+            CREATE TABLE device_properties_typed (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                series_id INTEGER NOT NULL,
+                value,
+                value_text TEXT,
+                timestamp TIMESTAMP NOT NULL,
+                FOREIGN KEY (series_id) REFERENCES property_series(id)
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE device_properties_latest_typed (
+                series_id INTEGER PRIMARY KEY,
+                value,
+                value_text TEXT,
+                timestamp TIMESTAMP NOT NULL,
+                FOREIGN KEY (series_id) REFERENCES property_series(id)
+            )
+        ''')
+        
+        # 旧数据的 value_type 为 Python 类型名, 值为 str() 的结果
+        converted_columns = '''
+            CASE old.value_type
+                WHEN 'bool' THEN old.property_value = 'True'
+                WHEN 'int' THEN CAST(old.property_value AS INTEGER)
+                WHEN 'float' THEN CAST(old.property_value AS REAL)
+            END,
+            CASE WHEN old.value_type IN ('bool', 'int', 'float')
+                THEN NULL ELSE old.property_value
+            END,
+            old.timestamp
+        '''
+        
+        cursor.execute(f'''
+            INSERT INTO device_properties_typed (id, series_id, value, value_text, timestamp)
+            SELECT old.id, s.id, {converted_columns}
+            FROM device_properties old
+            JOIN property_series s
+                ON s.did = old.did AND s.property_name = old.property_name
+            ORDER BY old.id
+        ''')
+        
+        cursor.execute(f'''
+            INSERT INTO device_properties_latest_typed (series_id, value, value_text, timestamp)
+            SELECT s.id, {converted_columns}
+            FROM device_properties_latest old
+            JOIN property_series s
+                ON s.did = old.did AND s.property_name = old.property_name
+        ''')
+        
+        cursor.execute('DROP TABLE device_properties')
+        cursor.execute('DROP TABLE device_properties_latest')
+        cursor.execute('ALTER TABLE device_properties_typed RENAME TO device_properties')
+        cursor.execute('ALTER TABLE device_properties_latest_typed RENAME TO device_properties_latest')
+        
+        cursor.execute('''
+            CREATE INDEX idx_device_properties_series_timestamp
+            ON device_properties(series_id, timestamp)
+        ''')
+    
+    @staticmethod
+    def _migrate_rollups(cursor: sqlite3.Cursor) -> None:
+        """创建多级汇总表并从历史记录回填"""
+        cursor.execute('''
+            CREATE TABLE property_rollups (
+                series_id INTEGER NOT NULL,
+                resolution INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                value_min REAL,
+                value_max REAL,
+                value_sum REAL,
+                sample_count INTEGER NOT NULL,
+                value_last REAL,
+                PRIMARY KEY (series_id, resolution, bucket)
+            ) WITHOUT ROWID
+        ''')
+        
+        # 按层级清理过期时间桶
+        cursor.execute('''
+            CREATE INDEX idx_property_rollups_resolution_bucket
+            ON property_rollups(resolution, bucket)
+        ''')
+        
+        # 历史记录按追加顺序写入, 时间桶内ID最大的记录即最后一个值
+        for resolution in ROLLUP_TIERS.values():
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS system_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    level TEXT NOT NULL,
-                    module TEXT,
-                    message TEXT NOT NULL,
-                    extra_data TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                WITH buckets AS (
+                    SELECT series_id,
+                           CAST(strftime('%s', timestamp) AS INTEGER) / :resolution * :resolution AS bucket,
+                           MIN(value) AS value_min, MAX(value) AS value_max,
+                           SUM(value) AS value_sum, COUNT(*) AS sample_count,
+                           MAX(id) AS last_id
+                    FROM device_properties
+                    WHERE value IS NOT NULL
+                    GROUP BY series_id, bucket
                 )
-            ''')
-            
-            # 创建索引
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_device_status_did_timestamp 
-                ON device_status(did, timestamp DESC)
-            ''')
-            
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_device_properties_did_timestamp 
-                ON device_properties(did, property_name, timestamp DESC)
-            ''')
-            
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_alerts_did_created 
-                ON alerts(did, created_at DESC)
-            ''')
-            
-            logger.info("数据库初始化完成")
+                INSERT INTO property_rollups
+                (series_id, resolution, bucket, value_min, value_max, value_sum, sample_count, value_last)
+                SELECT b.series_id, :resolution, b.bucket, b.value_min, b.value_max,
+                       b.value_sum, b.sample_count, dp.value
+                FROM buckets b
+                JOIN device_properties dp ON dp.id = b.last_id
+            ''', {'resolution': resolution})
+    
+    @staticmethod
+    def _migrate_epoch_timestamps(cursor: sqlite3.Cursor) -> None:
+        """属性历史的时间戳改为Unix时间戳整数存储"""
+        # 图表按时间戳数值读取, 不再逐行解析时间字符串; 整数时间戳也比文本更省空间
+        cursor.execute('''
+            CREATE TABLE device_properties_epoch (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                series_id INTEGER NOT NULL,
+                value,
+                value_text TEXT,
+                ts INTEGER NOT NULL,
+                FOREIGN KEY (series_id) REFERENCES property_series(id)
+            )
+        ''')
+        
+        cursor.execute('''
+            INSERT INTO device_properties_epoch (id, series_id, value, value_text, ts)
+            SELECT id, series_id, value, value_text, CAST(strftime('%s', timestamp) AS INTEGER)
+            FROM device_properties
+            ORDER BY id
+        ''')
+        
+        cursor.execute('DROP TABLE device_properties')
+        cursor.execute('ALTER TABLE device_properties_epoch RENAME TO device_properties')
+        
+        cursor.execute('''
+            CREATE INDEX idx_device_properties_series_ts
+            ON device_properties(series_id, ts)
+        ''')
+    
+    @staticmethod
+    def _migrate_stats_counters(cursor: sqlite3.Cursor) -> None:
+        """创建统计计数器表及维护设备、报警计数的触发器"""
+        cursor.execute('''
+            CREATE TABLE stats_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        
+        for name, query in STATS_COUNTERS.items():
+            cursor.execute(
+                f'INSERT INTO stats_counters (name, value) SELECT ?, ({query})', (name,)
+            )
+        
+        # 布尔列按 IS 1 / IS 0 计算增量, NULL 值不参与计数也不会把计数器变成 NULL
+        cursor.execute('''
+            CREATE TRIGGER stats_devices_insert AFTER INSERT ON devices
+            BEGIN
+                UPDATE stats_counters SET value = value + 1 WHERE name = 'total_devices';
+                UPDATE stats_counters SET value = value + (NEW.online IS 1) WHERE name = 'online_devices';
+            END
+        ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER stats_devices_delete AFTER DELETE ON devices
+            BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'total_devices';
+                UPDATE stats_counters SET value = value - (OLD.online IS 1) WHERE name = 'online_devices';
+            END
+        ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER stats_devices_online AFTER UPDATE OF online ON devices
+            WHEN (OLD.online IS 1) != (NEW.online IS 1)
+            BEGIN
+                UPDATE stats_counters SET value = value + (NEW.online IS 1) - (OLD.online IS 1)
+                WHERE name = 'online_devices';
+            END
+        ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER stats_alerts_insert AFTER INSERT ON alerts
+            BEGIN
+                UPDATE stats_counters SET value = value + (NEW.resolved IS 0) WHERE name = 'unresolved_alerts';
+            END
+        ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER stats_alerts_delete AFTER DELETE ON alerts
+            BEGIN
+                UPDATE stats_counters SET value = value - (OLD.resolved IS 0) WHERE name = 'unresolved_alerts';
+            END
+        ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER stats_alerts_resolved AFTER UPDATE OF resolved ON alerts
+            WHEN (OLD.resolved IS 0) != (NEW.resolved IS 0)
+            BEGIN
+                UPDATE stats_counters SET value = value + (NEW.resolved IS 0) - (OLD.resolved IS 0)
+                WHERE name = 'unresolved_alerts';
+            END
+        ''')
+    
+    def _load_counters(self, conn: sqlite3.Connection) -> None:
+        """从 stats_counters 表刷新统计计数器的内存镜像"""
+        # 加锁读取并替换, 保证后读到的(更新的)快照不会被先读到的覆盖
+        with self._counters_lock:
+            rows = conn.execute('SELECT name, value FROM stats_counters').fetchall()
+            self._counters = {**dict.fromkeys(STATS_COUNTERS, 0), **{name: value for name, value in rows}}
+    
+    def _counters_changed(self) -> None:
+        """标记当前事务修改了计数器(含触发器维护的计数器), 提交后刷新内存镜像"""
+        self._local.counters_changed = True
+    
+    def _add_counters(self, cursor: sqlite3.Cursor, deltas: Dict[str, int]) -> None:
+        """在当前事务中累加由写入路径维护的计数器"""
+        params = [(delta, name) for name, delta in deltas.items() if delta]
+        if params:
+            cursor.executemany('UPDATE stats_counters SET value = value + ? WHERE name = ?', params)
+        self._counters_changed()
     
     def add_or_update_device(self, device_info: Dict[str, Any]) -> bool:
         """
@@ -204,6 +676,7 @@ class DatabaseManager:
                         json.dumps(device_info.get('properties', {}))
                     ))
                 
+                self._counters_changed()
                 return True
         except Exception as e:
             logger.error(f"添加/更新设备失败: {e}")
@@ -217,6 +690,19 @@ class DatabaseManager:
             row = cursor.fetchone()
             return dict(row) if row else None
     
+    def set_device_monitor_interval(self, did: str, interval: int) -> bool:
+        """设置设备的自定义监控间隔(秒)"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE devices SET monitor_interval = ?, updated_at = ? WHERE did = ?
+                ''', (interval, datetime.now(), did))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"设置监控间隔失败: {e}")
+            return False
+    
     def get_all_devices(self, enabled_only: bool = False) -> List[Dict[str, Any]]:
         """获取所有设备"""
         with self.get_connection() as conn:
@@ -242,11 +728,79 @@ class DatabaseManager:
                     UPDATE devices SET last_seen = ?, online = ? WHERE did = ?
                 ''', (datetime.now(), online, did))
                 
+                self._add_counters(cursor, {'total_status_records': 1})
                 return True
         except Exception as e:
             logger.error(f"添加设备状态失败: {e}")
             return False
     
+    @staticmethod
+    def _encode_property_value(
+        property_value: Any,
+        value_type: str = None
+    ) -> Tuple[Any, Optional[str], str]:
+        """
+        将属性值转换为存储格式
+        
+        数值格式(含bool)存为 INTEGER 或 REAL, 其余存为文本
+        
+        Args:
+            property_value: 属性值
+            value_type: 属性格式, 为None时使用值的Python类型名
+            
+        Returns:
+            (数值, 文本值, 值类型), 数值与文本值只有一个非空
+        """
+        if value_type is None:
+            value_type = type(property_value).__name__
+        
+        if value_type in INTEGER_FORMATS or value_type in REAL_FORMATS:
+            try:
+                number = float(property_value)
+                if value_type in INTEGER_FORMATS and number.is_integer():
+                    return int(number), None, value_type
+                return number, None, value_type
+            except (ValueError, TypeError):
+                pass
+        
+        if isinstance(property_value, (dict, list)):
+            return None, json.dumps(property_value), value_type
+        return None, str(property_value), value_type
+    
+    @staticmethod
+    def _decode_property_value(value: Any, value_type: Optional[str]) -> Any:
+        """将存储的值还原为采样时的类型: bool 存为 INTEGER, 读出时还原为 True/False"""
+        if value_type == 'bool' and isinstance(value, (int, float)):
+            return bool(value)
+        return value
+    
+    def _get_series_id(
+        self,
+        cursor: sqlite3.Cursor,
+        did: str,
+        property_name: str,
+        value_type: str
+    ) -> int:
+        """获取属性序列ID, 不存在时创建; 值类型变化时同步更新"""
+        key = (did, property_name)
+        cached = self._series.get(key)
+        if cached is not None and cached[1] == value_type:
+            return cached[0]
+        
+        cursor.execute('''
+            INSERT INTO property_series (did, property_name, value_type)
+            VALUES (?, ?, ?)
+            ON CONFLICT(did, property_name) DO UPDATE SET value_type = excluded.value_type
+        ''', (did, property_name, value_type))
+        cursor.execute(
+            'SELECT id FROM property_series WHERE did = ? AND property_name = ?', key
+        )
+        series_id = cursor.fetchone()['id']
+        
+        with self._series_lock:
+            self._series[key] = (series_id, value_type)
+        return series_id
+    
     def add_device_property(
         self,
         did: str,
@@ -259,24 +813,122 @@ class DatabaseManager:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # 转换值为字符串存储
-                if isinstance(property_value, (dict, list)):
-                    value_str = json.dumps(property_value)
+                value, value_text, value_type = self._encode_property_value(property_value, value_type)
+                series_id = self._get_series_id(cursor, did, property_name, value_type)
+                row = (series_id, value, value_text, int(time.time()))
+                
+                cursor.execute(INSERT_PROPERTY_SAMPLE, row)
+                cursor.execute(UPSERT_LATEST_PROPERTY, row[:3] + (utc_text(row[3]),))
+                cursor.executemany(UPSERT_ROLLUP, self._aggregate_rollups([row]))
+                
+                self._add_counters(cursor, {'total_property_records': 1})
+                return True
+        except Exception as e:
+            logger.error(f"添加设备属性失败: {e}")
+            return False
+    
+    @staticmethod
+    def _aggregate_rollups(rows: List[Tuple[int, Any, Optional[str], int]]) -> List[tuple]:
+        """
+        将一批采样按 (序列, 层级, 时间桶) 预先聚合, 减少汇总表的更新次数
+        
+        Args:
+            rows: [(序列ID, 数值, 文本值, Unix时间戳), ...], 按时间顺序
+            
+        Returns:
+            UPSERT_ROLLUP 的参数列表
+        """
+        groups: Dict[Tuple[int, int, int], list] = {}
+        
+        for series_id, value, _, epoch in rows:
+            if value is None:
+                continue
+            
+            for resolution in ROLLUP_TIERS.values():
+                key = (series_id, resolution, epoch // resolution * resolution)
+                group = groups.get(key)
+                if group is None:
+                    groups[key] = [value, value, value, 1, value]
                 else:
-                    value_str = str(property_value)
+                    group[0] = min(group[0], value)
+                    group[1] = max(group[1], value)
+                    group[2] += value
+                    group[3] += 1
+                    group[4] = value
+        
+        return [key + tuple(group) for key, group in groups.items()]
+    
+    def add_samples_batch(
+        self,
+        property_rows: List[Tuple[str, str, Any, Optional[str], int, bool]],
+        status_rows: List[Tuple[str, Dict[str, Any], bool, str, datetime]]
+    ) -> bool:
+        """
+        在一个事务中批量写入属性和状态记录
+        
+        Args:
+            property_rows: [(did, 属性名, 值, 值类型, Unix时间戳, 是否写入历史), ...],
+                按记录策略跳过的采样只更新最新值表
+            status_rows: [(did, 状态数据, 是否在线, UTC时间戳, 本地采集时间), ...]
+            
+        Returns:
+            是否成功
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
                 
-                if value_type is None:
-                    value_type = type(property_value).__name__
+                if property_rows:
+                    params = []
+                    history_params = []
+                    texts: Dict[int, str] = {}
+                    latest_params = []
+                    for did, property_name, property_value, value_type, epoch, record in property_rows:
+                        value, value_text, value_type = self._encode_property_value(
+                            property_value, value_type
+                        )
+                        series_id = self._get_series_id(cursor, did, property_name, value_type)
+                        row = (series_id, value, value_text, epoch)
+                        params.append(row)
+                        if record:
+                            history_params.append(row)
+                        
+                        # 最新值表仍以文本保存时间, 同一批次的时间戳大多相同
+                        text = texts.get(epoch)
+                        if text is None:
+                            text = texts[epoch] = utc_text(epoch)
+                        latest_params.append((series_id, value, value_text, text))
+                    
+                    cursor.executemany(INSERT_PROPERTY_SAMPLE, history_params)
+                    cursor.executemany(UPSERT_LATEST_PROPERTY, latest_params)
+                    # 汇总包含按记录策略跳过的采样, 反映每次轮询的实际值
+                    cursor.executemany(UPSERT_ROLLUP, self._aggregate_rollups(params))
                 
-                cursor.execute('''
-                    INSERT INTO device_properties 
-                    (did, property_name, property_value, value_type)
-                    VALUES (?, ?, ?, ?)
-                ''', (did, property_name, value_str, value_type))
+                if status_rows:
+                    cursor.executemany('''
+                        INSERT INTO device_status (did, status_data, online, timestamp)
+                        VALUES (?, ?, ?, ?)
+                    ''', [
+                        (did, json.dumps(status_data), online, timestamp)
+                        for did, status_data, online, timestamp, _ in status_rows
+                    ])
+                    
+                    # 更新设备表的last_seen
+                    cursor.executemany('''
+                        UPDATE devices SET last_seen = ?, online = ? WHERE did = ?
+                    ''', [
+                        (seen_at, online, did)
+                        for did, _, online, _, seen_at in status_rows
+                    ])
                 
+                if property_rows or status_rows:
+                    self._add_counters(cursor, {
+                        'total_property_records': len(history_params) if property_rows else 0,
+                        'total_status_records': len(status_rows)
+                    })
                 return True
         except Exception as e:
-            logger.error(f"添加设备属性失败: {e}")
+            logger.error(f"批量写入记录失败: {e}")
             return False
     
     def get_device_properties_history(
@@ -292,25 +944,172 @@ class DatabaseManager:
             cursor = conn.cursor()
             
             query = '''
-                SELECT property_value, value_type, timestamp 
-                FROM device_properties 
-                WHERE did = ? AND property_name = ?
+                SELECT COALESCE(dp.value, dp.value_text) AS property_value,
+                       s.value_type, datetime(dp.ts, 'unixepoch') AS timestamp
+                FROM property_series s
+                JOIN device_properties dp ON dp.series_id = s.id
+                WHERE s.did = ? AND s.property_name = ?
             '''
             params = [did, property_name]
             
             if start_time:
-                query += ' AND timestamp >= ?'
-                params.append(start_time)
+                query += ' AND dp.ts >= ?'
+                params.append(utc_epoch(start_time))
             
             if end_time:
-                query += ' AND timestamp <= ?'
-                params.append(end_time)
+                query += ' AND dp.ts <= ?'
+                params.append(utc_epoch(end_time))
             
-            query += ' ORDER BY timestamp DESC LIMIT ?'
+            query += ' ORDER BY dp.ts DESC LIMIT ?'
             params.append(limit)
             
             cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            history = []
+            for row in cursor.fetchall():
+                row_dict = dict(row)
+                row_dict['property_value'] = self._decode_property_value(
+                    row_dict['property_value'], row_dict['value_type']
+                )
+                history.append(row_dict)
+            return history
+    
+    @staticmethod
+    def select_rollup_resolution(
+        start_time: datetime,
+        end_time: datetime,
+        min_points: int = 200
+    ) -> int:
+        """
+        选择仍能提供至少 min_points 个点的最粗汇总层级
+        
+        Returns:
+            时间桶长度(秒); 范围太短时返回0, 表示应直接读取原始历史
+        """
+        span = utc_epoch(end_time) - utc_epoch(start_time)
+        for resolution in sorted(ROLLUP_TIERS.values(), reverse=True):
+            if span / resolution >= min_points:
+                return resolution
+        return 0
+    
+    def get_property_series(
+        self,
+        did: str,
+        property_name: str,
+        start_time: datetime,
+        end_time: datetime = None,
+        max_points: int = 1000,
+        gap_threshold: float = None,
+        sample_interval: float = None,
+        method: str = 'lttb'
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取图表用的数值序列
+        
+        自动选择汇总层级, 在数据中断处插入NaN断点, 并降采样到约 max_points 个点
+        
+        Args:
+            did: 设备ID
+            property_name: 属性名
+            start_time: 开始时间(UTC)
+            end_time: 结束时间(UTC), 为None时到当前时间
+            max_points: 目标点数, 通常为图表的像素宽度
+            gap_threshold: 相邻点间隔超过该值(秒)时插入断点, 为None时不插入
+            sample_interval: 轮询间隔(秒); 原始记录相隔更久时视为值一直保持(按记录策略跳过的采样)
+            method: 降采样方法, 'lttb' 或 'minmax'
+            
+        Returns:
+            (Unix时间戳数组, 值数组), 断点处的值为NaN
+        """
+        start_epoch = utc_epoch(start_time)
+        end_epoch = utc_epoch(end_time) if end_time else int(time.time())
+        resolution = self.select_rollup_resolution(start_time, end_time or datetime.now(timezone.utc), max_points)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                'SELECT id FROM property_series WHERE did = ? AND property_name = ?',
+                (did, property_name)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return np.empty(0), np.empty(0)
+            series_id = row['id']
+            
+            if resolution:
+                # 汇总包含每次轮询的值, 时间桶以中点和平均值表示
+                cursor.execute('''
+                    SELECT bucket + ? / 2.0, value_sum / sample_count
+                    FROM property_rollups
+                    WHERE series_id = ? AND resolution = ? AND bucket >= ? AND bucket <= ?
+                    ORDER BY bucket
+                ''', (resolution, series_id, resolution,
+                      start_epoch // resolution * resolution, end_epoch))
+                x, y = _fetch_xy(cursor)
+                if gap_threshold is not None:
+                    gap_threshold = max(gap_threshold, resolution * 2)
+            else:
+                x, y = self._load_raw_series(
+                    cursor, series_id, start_epoch, end_epoch, gap_threshold, sample_interval
+                )
+        
+        return downsample(x, y, max_points, method, gap_threshold)
+    
+    @staticmethod
+    def _load_raw_series(
+        cursor: sqlite3.Cursor,
+        series_id: int,
+        start_epoch: int,
+        end_epoch: int,
+        gap_threshold: float = None,
+        sample_interval: float = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        读取原始记录并补全稀疏数据
+        
+        范围起点之前的最后一个值在起点处仍然有效; 最新值表中的采集时间
+        之前值一直保持; 稀疏记录之间按阶梯保持, 避免长距离斜线插值
+        """
+        cursor.execute('''
+            SELECT ts, value
+            FROM device_properties
+            WHERE series_id = ? AND ts >= ? AND ts <= ? AND value IS NOT NULL
+            ORDER BY ts
+        ''', (series_id, start_epoch, end_epoch))
+        x, y = _fetch_xy(cursor)
+        
+        cursor.execute('''
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER), value
+            FROM device_properties_latest
+            WHERE series_id = ? AND value IS NOT NULL
+        ''', (series_id,))
+        tail = cursor.fetchone()
+        if tail and tail[0] <= end_epoch and (len(x) == 0 or tail[0] > x[-1]):
+            x = np.append(x, tail[0])
+            y = np.append(y, tail[1])
+        
+        if len(x):
+            cursor.execute('''
+                SELECT ts, value
+                FROM device_properties
+                WHERE series_id = ? AND ts < ? AND value IS NOT NULL
+                ORDER BY ts DESC LIMIT 1
+            ''', (series_id, start_epoch))
+            seed = cursor.fetchone()
+            if seed and (gap_threshold is None or x[0] - seed[0] <= gap_threshold):
+                x = np.insert(x, 0, start_epoch)
+                y = np.insert(y, 0, seed[1])
+        
+        if sample_interval and len(x) > 1:
+            dx = np.diff(x)
+            held = (dx > sample_interval * 1.5) & (y[1:] != y[:-1])
+            if gap_threshold is not None:
+                held &= dx <= gap_threshold
+            positions = np.flatnonzero(held) + 1
+            x = np.insert(x, positions, x[positions] - 1)
+            y = np.insert(y, positions, y[positions - 1])
+        
+        return x, y
     
     def get_latest_device_properties(self, did: str) -> Dict[str, Any]:
         """
@@ -325,16 +1124,14 @@ class DatabaseManager:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # 使用子查询获取每个属性的最新记录
+            # 最新值表按 (did, property_name) 主键存储, 无需扫描历史
             cursor.execute('''
-                SELECT property_name, property_value, value_type, timestamp
-                FROM device_properties dp1
-                WHERE did = ? AND timestamp = (
-                    SELECT MAX(timestamp)
-                    FROM device_properties dp2
-                    WHERE dp2.did = dp1.did AND dp2.property_name = dp1.property_name
-                )
-                ORDER BY property_name
+                SELECT s.property_name, COALESCE(l.value, l.value_text) AS property_value,
+                       s.value_type, l.timestamp
+                FROM property_series s
+                JOIN device_properties_latest l ON l.series_id = s.id
+                WHERE s.did = ?
+                ORDER BY s.property_name
             ''', (did,))
             
             result = {}
@@ -342,7 +1139,7 @@ class DatabaseManager:
                 row_dict = dict(row)
                 property_name = row_dict['property_name']
                 result[property_name] = {
-                    'value': row_dict['property_value'],
+                    'value': self._decode_property_value(row_dict['property_value'], row_dict['value_type']),
                     'value_type': row_dict['value_type'],
                     'timestamp': row_dict['timestamp']
                 }
@@ -361,14 +1158,11 @@ class DatabaseManager:
             
             # 使用一次查询获取所有设备的最新属性
             cursor.execute('''
-                SELECT did, property_name, property_value, value_type, timestamp
-                FROM device_properties dp1
-                WHERE timestamp = (
-                    SELECT MAX(timestamp)
-                    FROM device_properties dp2
-                    WHERE dp2.did = dp1.did AND dp2.property_name = dp1.property_name
-                )
-                ORDER BY did, property_name
+                SELECT s.did, s.property_name, COALESCE(l.value, l.value_text) AS property_value,
+                       s.value_type, l.timestamp
+                FROM property_series s
+                JOIN device_properties_latest l ON l.series_id = s.id
+                ORDER BY s.did, s.property_name
             ''')
             
             result = {}
@@ -381,7 +1175,7 @@ class DatabaseManager:
                     result[did] = {}
                 
                 result[did][property_name] = {
-                    'value': row_dict['property_value'],
+                    'value': self._decode_property_value(row_dict['property_value'], row_dict['value_type']),
                     'value_type': row_dict['value_type'],
                     'timestamp': row_dict['timestamp']
                 }
@@ -395,8 +1189,8 @@ class DatabaseManager:
         title: str,
         message: str = None,
         severity: str = 'INFO'
-    ) -> bool:
-        """添加报警记录"""
+    ) -> Optional[int]:
+        """添加报警记录, 返回报警ID, 失败时返回None"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
@@ -404,10 +1198,11 @@ class DatabaseManager:
                     INSERT INTO alerts (did, alert_type, severity, title, message)
                     VALUES (?, ?, ?, ?, ?)
                 ''', (did, alert_type, severity, title, message))
-                return True
+                self._counters_changed()
+                return cursor.lastrowid
         except Exception as e:
             logger.error(f"添加报警记录失败: {e}")
-            return False
+            return None
     
     def get_unresolved_alerts(self, did: str = None) -> List[Dict[str, Any]]:
         """获取未解决的报警"""
@@ -437,22 +1232,31 @@ class DatabaseManager:
                     SET resolved = 1, resolved_at = ? 
                     WHERE id = ?
                 ''', (datetime.now(), alert_id))
+                self._counters_changed()
                 return True
         except Exception as e:
             logger.error(f"解决报警失败: {e}")
             return False
     
-    def cleanup_old_data(self, retention_days: int) -> Tuple[int, int]:
+    def cleanup_old_data(
+        self,
+        retention_days: int,
+        rollup_retention_days: Dict[str, int] = None
+    ) -> Tuple[int, int]:
         """
         清理过期数据
         
         Args:
-            retention_days: 数据保留天数
+            retention_days: 原始历史数据保留天数
+            rollup_retention_days: 各汇总层级的保留天数 {'1m': 7, ...}, 未列出的层级不清理
             
         Returns:
             (删除的状态记录数, 删除的属性记录数)
         """
-        cutoff_date = datetime.now() - timedelta(days=retention_days)
+        # 历史记录的时间戳为UTC
+        cutoff_date = (datetime.now(timezone.utc) - timedelta(days=retention_days)).strftime(
+            '%Y-%m-%d %H:%M:%S'
+        )
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
@@ -465,44 +1269,80 @@ class DatabaseManager:
             
             # 清理设备属性历史
             cursor.execute('''
-                DELETE FROM device_properties WHERE timestamp < ?
-            ''', (cutoff_date,))
+                DELETE FROM device_properties WHERE ts < ?
+            ''', (utc_epoch(cutoff_date),))
             properties_deleted = cursor.rowcount
             
+            self._add_counters(cursor, {
+                'total_status_records': -status_deleted,
+                'total_property_records': -properties_deleted
+            })
+            
+            # 清理各层级的过期汇总
+            rollups_deleted = 0
+            for tier, days in (rollup_retention_days or {}).items():
+                resolution = ROLLUP_TIERS.get(tier)
+                if resolution is None:
+                    logger.warning(f"未知的汇总层级: {tier}")
+                    continue
+                cursor.execute('''
+                    DELETE FROM property_rollups WHERE resolution = ? AND bucket < ?
+                ''', (resolution, int(time.time()) - int(days * 86400)))
+                rollups_deleted += cursor.rowcount
+            
             logger.info(
                 f"清理完成: 删除 {status_deleted} 条状态记录, "
-                f"{properties_deleted} 条属性记录"
+                f"{properties_deleted} 条属性记录, {rollups_deleted} 个汇总时间桶"
             )
             
             return status_deleted, properties_deleted
     
     def get_statistics(self) -> Dict[str, Any]:
-        """获取数据库统计信息"""
+        """
+        获取数据库统计信息
+        
+        计数来自增量维护的计数器的内存镜像, 不扫描数据表
+        """
+        with self._counters_lock:
+            stats = dict(self._counters)
+        
+        # 数据库大小
+        stats['db_size_mb'] = round(self.db_path.stat().st_size / (1024 * 1024), 2)
+        
+        return stats
+    
+    def reconcile_statistics(self) -> Dict[str, int]:
+        """
+        按实际行数校准统计计数器
+        
+        在写事务中计数, 期间其他连接的写入会等待, 校准值不会漏掉并发写入的记录
+        
+        Returns:
+            各计数器的偏差 {名称: 实际值 - 计数器值}, 只包含有偏差的计数器
+        """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            stats = {}
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute('BEGIN IMMEDIATE')
             
-            # 设备数量
-            cursor.execute('SELECT COUNT(*) as count FROM devices')
-            stats['total_devices'] = cursor.fetchone()['count']
-            
-            cursor.execute('SELECT COUNT(*) as count FROM devices WHERE online = 1')
-            stats['online_devices'] = cursor.fetchone()['count']
-            
-            # 状态记录数量
-            cursor.execute('SELECT COUNT(*) as count FROM device_status')
-            stats['total_status_records'] = cursor.fetchone()['count']
-            
-            # 属性记录数量
-            cursor.execute('SELECT COUNT(*) as count FROM device_properties')
-            stats['total_property_records'] = cursor.fetchone()['count']
-            
-            # 未解决的报警数量
-            cursor.execute('SELECT COUNT(*) as count FROM alerts WHERE resolved = 0')
-            stats['unresolved_alerts'] = cursor.fetchone()['count']
+            cursor = conn.cursor()
+            counters = {
+                name: value
+                for name, value in cursor.execute('SELECT name, value FROM stats_counters').fetchall()
+            }
             
-            # 数据库大小
-            stats['db_size_mb'] = round(self.db_path.stat().st_size / (1024 * 1024), 2)
+            drift = {}
+            for name, query in STATS_COUNTERS.items():
+                actual = cursor.execute(query).fetchone()[0]
+                if actual != counters.get(name):
+                    drift[name] = actual - (counters.get(name) or 0)
+                    cursor.execute('''
+                        INSERT INTO stats_counters (name, value) VALUES (?, ?)
+                        ON CONFLICT(name) DO UPDATE SET value = excluded.value
+                    ''', (name, actual))
             
-            return stats
+            self._counters_changed()
+        
+        if drift:
+            logger.warning(f"统计计数器已校准, 偏差: {drift}")
+        return drift
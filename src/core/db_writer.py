@@ -0,0 +1,231 @@
+"""数据库异步批量写入模块"""
+import time
+from datetime import datetime
+from queue import Queue, Empty, Full
+from threading import Thread, Event, Lock
+from typing import Dict, List, Any, Optional, Tuple
+
+from .database import DatabaseManager, utc_timestamp
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 过期数据清理间隔(秒)
+CLEANUP_INTERVAL = 3600
+
+# 统计计数器校准间隔(秒), 校准需要全表计数, 不在启动时执行
+RECONCILE_INTERVAL = 6 * 3600
+
+
+class DatabaseWriter:
+    """
+    写后(write-behind)批量写入器
+    
+    监控线程只把采样放入有界队列即返回, 由独立的写入线程
+    攒够 batch_size 条或等待 flush_interval 毫秒后(先到者为准)
+    用 executemany 在一个事务中批量写入
+    """
+    
+    def __init__(
+        self,
+        database: DatabaseManager,
+        batch_size: int = 1000,
+        flush_interval: int = 1000,
+        max_queue_size: int = 10000,
+        retention_days: int = None,
+        rollup_retention_days: Dict[str, int] = None
+    ):
+        """
+        初始化批量写入器
+        
+        Args:
+            database: 数据库管理器
+            batch_size: 每批最多写入的记录数
+            flush_interval: 最长刷新间隔(毫秒)
+            max_queue_size: 队列容量
+            retention_days: 原始历史保留天数, 为None时不自动清理
+            rollup_retention_days: 各汇总层级的保留天数
+        """
+        self.database = database
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(1, flush_interval) / 1000.0
+        self.retention_days = retention_days
+        self.rollup_retention_days = rollup_retention_days
+        self._last_cleanup = 0.0
+        self._last_reconcile = time.monotonic()
+        
+        self._queue: Queue = Queue(maxsize=max(1, max_queue_size))
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+        
+        self._metrics_lock = Lock()
+        self._metrics: Dict[str, Any] = {
+            'rows_written': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'dropped': 0,
+            'last_flush_rows': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0
+        }
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> None:
+        """启动写入线程"""
+        if self.is_running:
+            return
+        
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name="Database-Writer")
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        """停止写入线程, 退出前写完队列中的全部记录"""
+        if self._thread is None:
+            return
+        
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning(f"写入线程未能在 {timeout} 秒内结束, 剩余 {self._queue.qsize()} 条记录")
+        self._thread = None
+    
+    def add_device_property(
+        self,
+        did: str,
+        property_name: str,
+        property_value: Any,
+        value_type: str = None,
+        record_history: bool = True
+    ) -> bool:
+        """
+        将属性采样放入写入队列
+        
+        record_history 为False时只更新最新值表, 不写入历史
+        """
+        return self._enqueue(('property', (
+            did, property_name, property_value, value_type, int(time.time()), record_history
+        )))
+    
+    def add_device_status(self, did: str, status_data: Dict[str, Any], online: bool = True) -> bool:
+        """将设备状态放入写入队列"""
+        return self._enqueue(('status', (
+            did, status_data, online, utc_timestamp(), datetime.now()
+        )))
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取写入统计(队列深度、刷新耗时等)"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics['queue_depth'] = self._queue.qsize()
+        return metrics
+    
+    def _enqueue(self, item: Tuple[str, tuple]) -> bool:
+        """放入队列; 队列已满时立即丢弃记录, 不阻塞监控线程"""
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except Full:
+            with self._metrics_lock:
+                self._metrics['dropped'] += 1
+            logger.warning("数据库写入队列已满, 丢弃一条记录")
+            return False
+    
+    def _run(self) -> None:
+        """写入线程主循环"""
+        while True:
+            stopping = self._stop_event.is_set()
+            items = self._collect(drain=stopping)
+            
+            if items:
+                self._flush(items)
+            elif stopping:
+                break
+            
+            if not stopping:
+                self._cleanup_if_due()
+                self._reconcile_if_due()
+    
+    def _cleanup_if_due(self) -> None:
+        """定期清理过期的历史与汇总数据, 与批量写入在同一线程中串行执行"""
+        if self.retention_days is None:
+            return
+        
+        now = time.monotonic()
+        if self._last_cleanup and now - self._last_cleanup < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        
+        try:
+            self.database.cleanup_old_data(self.retention_days, self.rollup_retention_days)
+        except Exception as e:
+            logger.error(f"清理过期数据失败: {e}")
+    
+    def _reconcile_if_due(self) -> None:
+        """定期按实际行数校准统计计数器, 修正可能的漂移"""
+        now = time.monotonic()
+        if now - self._last_reconcile < RECONCILE_INTERVAL:
+            return
+        self._last_reconcile = now
+        
+        try:
+            self.database.reconcile_statistics()
+        except Exception as e:
+            logger.error(f"校准统计计数器失败: {e}")
+    
+    def _collect(self, drain: bool) -> List[Tuple[str, tuple]]:
+        """
+        收集一批记录
+        
+        等待第一条记录后继续收集, 直到达到 batch_size 或
+        距第一条记录超过 flush_interval; drain 时不等待
+        """
+        items = []
+        
+        if drain:
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            return items
+        
+        try:
+            items.append(self._queue.get(timeout=0.5))
+        except Empty:
+            return items
+        
+        deadline = time.monotonic() + self.flush_interval
+        while len(items) < self.batch_size and not self._stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        
+        return items
+    
+    def _flush(self, items: List[Tuple[str, tuple]]) -> None:
+        """在一个事务中写入一批记录"""
+        property_rows = [row for kind, row in items if kind == 'property']
+        status_rows = [row for kind, row in items if kind == 'status']
+        
+        start = time.perf_counter()
+        success = self.database.add_samples_batch(property_rows, status_rows)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        with self._metrics_lock:
+            if success:
+                self._metrics['rows_written'] += len(items)
+                self._metrics['flushes'] += 1
+            else:
+                self._metrics['failed_flushes'] += 1
+            self._metrics['last_flush_rows'] = len(items)
+            self._metrics['last_flush_ms'] = round(elapsed_ms, 2)
+            self._metrics['max_flush_ms'] = max(self._metrics['max_flush_ms'], round(elapsed_ms, 2))
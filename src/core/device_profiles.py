@@ -1,14 +1,96 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Callable
 import json
+import math
 import os
+import time
 from pathlib import Path
+from threading import RLock
 from ..utils.path_utils import get_resource_path
 
+# 开启热重载时, 没有配置文件的型号最多每隔这么久(秒)重新扫描一次配置目录
+PROFILE_RESCAN_INTERVAL = 5.0
+
+# 基础配置在概览中显示的属性
+DEFAULT_OVERVIEW_KEYS = (
+    'temperature', 'relative-humidity', 'electric-power', 'power',
+    'electric-current', 'voltage', 'battery-level'
+)
+
+Formatter = Callable[[Any], str]
+
+
+def compile_number_formatter(template: str, integer: bool = False, scale: float = None) -> Formatter:
+    """
+    Build a formatter for numeric values.
+    integer truncates like int(float(value)); values that are not numbers are shown as-is.
+    """
+    render = template.format
+    convert = int if integer else None
+
+    def format_number(value: Any) -> str:
+        try:
+            number = float(value)
+            if scale is not None:
+                number *= scale
+            return render(convert(number) if convert else number)
+        except (ValueError, TypeError, OverflowError):
+            return str(value)
+    return format_number
+
+
+def compile_label_formatter(labels: Dict[Any, str], fallback: Formatter = str) -> Formatter:
+    """Build a formatter that maps enum values to labels."""
+    def format_label(value: Any) -> str:
+        label = labels.get(value)
+        if label is None:
+            try:
+                label = labels.get(int(value))
+            except (ValueError, TypeError, OverflowError):
+                pass
+        return label if label is not None else fallback(value)
+    return format_label
+
+
+def compile_switch_formatter(on_label: str, off_label: str) -> Formatter:
+    def format_switch(value: Any) -> str:
+        return on_label if str(value).lower() in ('true', '1', 'on') else off_label
+    return format_switch
+
+
+# 按属性名的默认格式
+KEY_FORMATTERS: Dict[str, Formatter] = {
+    'temperature': compile_number_formatter('{:.1f}°C'),
+    'relative-humidity': compile_number_formatter('{}%', integer=True),
+    'battery-level': compile_number_formatter('{}%', integer=True),
+    'electric-power': compile_number_formatter('{:.1f}W'),
+    'power': compile_number_formatter('{:.1f}W'),
+    'electric-current': compile_number_formatter('{:.2f}A'),
+    'voltage': compile_number_formatter('{:.1f}V'),
+    'brightness': compile_number_formatter('{}%', integer=True),
+    'color-temperature': compile_number_formatter('{}K', integer=True),
+    'on': compile_switch_formatter("开启", "关闭"),
+    'mute': compile_switch_formatter("静音", "未静音"),
+    'volume': compile_number_formatter('🔊{}', integer=True),
+    'playing-state': compile_label_formatter({0: "⏸暂停", 1: "▶播放中", 2: "⏳缓冲中"}),
+    'connected-device-count': compile_number_formatter('{}台设备', integer=True),
+}
+
+# MIoT spec 单位 -> (后缀, 小数位数); 小数位数为0时截断为整数
+UNIT_FORMATS: Dict[str, Tuple[str, int]] = {
+    'celsius': ('°C', 1),
+    'percentage': ('%', 0),
+    'watt': ('W', 1),
+    'ampere': ('A', 2),
+    'volt': ('V', 1),
+    'kelvin': ('K', 0),
+}
+
 class DeviceProfile:
     """Base class for device profiles."""
     
     def __init__(self, model: str):
         self.model = model
+        self._formatters: Dict[str, Formatter] = {}  # 属性名 -> 格式化函数
 
     def get_display_properties(self, properties: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -33,14 +115,9 @@ class DeviceProfile:
         Get properties to display in the device list overview column.
         """
         # Default implementation: show common status properties
-        target_keys = [
-            'temperature', 'relative-humidity', 'electric-power', 'power',
-            'electric-current', 'voltage', 'battery-level'
-        ]
-        
         display_props = []
         
-        for key in target_keys:
+        for key in DEFAULT_OVERVIEW_KEYS:
             if key in properties:
                 data = properties[key]
                 display_props.append({
@@ -65,38 +142,24 @@ class DeviceProfile:
         # Default: no card properties
         return []
 
+    def get_recording_policy(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the history recording policy for a property.
+        Returns None when every sample should be recorded.
+        """
+        # Default: record every sample
+        return None
+
     def format_value(self, key: str, value: Any) -> str:
         """Format a property value for display."""
-        try:
-            if key == 'temperature':
-                return f"{float(value):.1f}°C"
-            elif key in ['relative-humidity', 'battery-level']:
-                return f"{int(float(value))}%"
-            elif key in ['electric-power', 'power']:
-                return f"{float(value):.1f}W"
-            elif key == 'electric-current':
-                return f"{float(value):.2f}A"
-            elif key == 'voltage':
-                return f"{float(value):.1f}V"
-            elif key == 'brightness':
-                return f"{int(float(value))}%"
-            elif key == 'color-temperature':
-                return f"{int(float(value))}K"
-            elif key == 'on':
-                return "开启" if str(value).lower() in ['true', '1', 'on'] else "关闭"
-            elif key == 'mute':
-                return "静音" if str(value).lower() in ['true', '1', 'on'] else "未静音"
-            elif key == 'volume':
-                return f"🔊{int(float(value))}"
-            elif key == 'playing-state':
-                state_map = {0: "⏸暂停", 1: "▶播放中", 2: "⏳缓冲中"}
-                return state_map.get(int(value), str(value))
-            elif key == 'connected-device-count':
-                return f"{int(value)}台设备"
-            else:
-                return str(value)
-        except (ValueError, TypeError):
-            return str(value)
+        formatter = self._formatters.get(key)
+        if formatter is None:
+            formatter = self._formatters[key] = self._compile_formatter(key)
+        return formatter(value)
+
+    def _compile_formatter(self, key: str) -> Formatter:
+        """Build the formatter for a property; called once per key."""
+        return KEY_FORMATTERS.get(key, str)
 
 
 class JsonDeviceProfile(DeviceProfile):
@@ -113,16 +176,27 @@ class JsonDeviceProfile(DeviceProfile):
         for service in self.services:
             for prop in service.get('properties', []):
                 self.property_map[prop['name']] = prop
+        
+        # Profiles are cached per model, so resolve the UI config once here
+        # instead of walking ui_config on every update
+        details = self.ui_config.get('details', {})
+        dashboard = self.ui_config.get('dashboard', {})
+        self.friendly_names: Dict[str, str] = details.get('friendly_names', {})
+        self.overview_keys: Tuple[str, ...] = tuple(dashboard.get('overview_properties', []))
+        self.display_order: Tuple[str, ...] = tuple(details.get('display_order', []))
+        self._display_order_set = frozenset(self.display_order)
+        self._chart_properties = self._build_chart_properties(dashboard)
+        self._card_properties = self._build_card_properties(details)
+        self._formatters = {key: self._compile_formatter(key) for key in self.property_map}
 
     def get_friendly_names(self) -> Dict[str, str]:
-        return self.ui_config.get('details', {}).get('friendly_names', {})
+        return self.friendly_names
 
     def get_overview_properties(self, properties: Dict[str, Any]) -> List[Dict[str, Any]]:
-        target_keys = self.ui_config.get('dashboard', {}).get('overview_properties', [])
         display_props = []
-        friendly_names = self.get_friendly_names()
+        friendly_names = self.friendly_names
         
-        for key in target_keys:
+        for key in self.overview_keys:
             if key in properties:
                 data = properties[key]
                 display_props.append({
@@ -135,12 +209,11 @@ class JsonDeviceProfile(DeviceProfile):
         return display_props
 
     def get_display_properties(self, properties: Dict[str, Any]) -> List[Dict[str, Any]]:
-        target_keys = self.ui_config.get('details', {}).get('display_order', [])
         display_props = []
-        friendly_names = self.get_friendly_names()
+        friendly_names = self.friendly_names
         
         # Add properties in defined order
-        for key in target_keys:
+        for key in self.display_order:
             if key in properties:
                 data = properties[key]
                 display_props.append({
@@ -153,7 +226,7 @@ class JsonDeviceProfile(DeviceProfile):
         
         # Add any other properties that are not in the target list but exist
         for key, data in properties.items():
-            if key not in target_keys:
+            if key not in self._display_order_set:
                 display_props.append({
                     'key': key,
                     'name': friendly_names.get(key, key),
@@ -166,7 +239,15 @@ class JsonDeviceProfile(DeviceProfile):
 
     def get_chart_properties(self) -> Dict[str, Dict[str, Any]]:
         """Get configuration for properties to be charted."""
-        chart_config = self.ui_config.get('dashboard', {}).get('chart_properties', {})
+        return self._chart_properties
+
+    def get_card_properties(self) -> List[Dict[str, Any]]:
+        """Get properties to display as cards/controls."""
+        return self._card_properties
+
+    @staticmethod
+    def _build_chart_properties(dashboard: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        chart_config = dashboard.get('chart_properties', {})
         result = {}
         for key, config in chart_config.items():
             result[key] = {
@@ -176,16 +257,15 @@ class JsonDeviceProfile(DeviceProfile):
             }
         return result
 
-    def get_card_properties(self) -> List[Dict[str, Any]]:
-        """Get properties to display as cards/controls."""
-        card_config = self.ui_config.get('details', {}).get('card_properties', [])
+    def _build_card_properties(self, details: Dict[str, Any]) -> List[Dict[str, Any]]:
+        card_config = details.get('card_properties', [])
         # If it's a list of strings, convert to default config
         result = []
         for item in card_config:
             if isinstance(item, str):
                 result.append({
                     'key': item,
-                    'name': self.get_friendly_names().get(item, item),
+                    'name': self.friendly_names.get(item, item),
                     'type': 'info' # default type
                 })
             elif isinstance(item, dict):
@@ -193,71 +273,201 @@ class JsonDeviceProfile(DeviceProfile):
                 if key:
                     result.append({
                         'key': key,
-                        'name': item.get('label', self.get_friendly_names().get(key, key)),
+                        'name': item.get('label', self.friendly_names.get(key, key)),
                         'type': item.get('type', 'info'),
                         'icon': item.get('icon'),
                         'color': item.get('color')
                     })
         return result
 
+    def get_recording_policy(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the history recording policy for a property (default merged with per-property)."""
+        recording = self.profile_data.get('recording', {})
+        policy = dict(recording.get('default', {}))
+        policy.update(recording.get('properties', {}).get(key, {}))
+        return policy or None
 
-    def format_value(self, key: str, value: Any) -> str:
-        # Try to use unit from property definition if available
+
+    def _compile_formatter(self, key: str) -> Formatter:
+        """
+        Build the formatter for a property from its definition:
+        unit and scale first, then the default format for the key,
+        then value-list labels, then precision.
+        """
         prop_def = self.property_map.get(key)
-        if prop_def:
-            # Apply scaling if defined
-            scale = prop_def.get('scale')
-            if scale is not None:
-                try:
-                    value = float(value) * float(scale)
-                except (ValueError, TypeError):
-                    pass
+        if not prop_def:
+            return super()._compile_formatter(key)
 
-            unit = prop_def.get('unit', '')
-            try:
-                if unit == 'celsius':
-                    return f"{float(value):.1f}°C"
-                elif unit == 'percentage':
-                    return f"{int(float(value))}%"
-                elif unit == 'watt':
-                    return f"{float(value):.1f}W"
-                elif unit == 'ampere':
-                    return f"{float(value):.2f}A"
-                elif unit == 'volt':
-                    return f"{float(value):.1f}V"
-                elif unit == 'kelvin':
-                    return f"{int(float(value))}K"
-            except (ValueError, TypeError):
-                pass
-        
-        # Fallback to base implementation
-        return super().format_value(key, value)
+        scale = prop_def.get('scale')
+        try:
+            scale = float(scale) if scale is not None else None
+        except (ValueError, TypeError):
+            scale = None
 
+        precision = prop_def.get('precision')
+
+        unit_format = UNIT_FORMATS.get(prop_def.get('unit', ''))
+        if unit_format:
+            suffix, decimals = unit_format
+            if precision is not None:
+                decimals = precision
+            if decimals:
+                return compile_number_formatter(f'{{:.{decimals}f}}{suffix}', scale=scale)
+            return compile_number_formatter(f'{{}}{suffix}', integer=True, scale=scale)
+
+        key_formatter = KEY_FORMATTERS.get(key)
+        if key_formatter:
+            if scale is None:
+                return key_formatter
+            return lambda value: key_formatter(self._scale(value, scale))
+
+        value_list = prop_def.get('value-list')
+        if value_list:
+            return compile_label_formatter({
+                item['value']: item.get('description', str(item['value']))
+                for item in value_list if 'value' in item
+            })
+
+        if precision is None and scale is not None:
+            # 缩放后的精度由步长决定, 如 scale 0.001 显示3位小数
+            value_range = prop_def.get('value-range') or []
+            step = abs(float(value_range[2]) * scale) if len(value_range) > 2 else abs(scale)
+            precision = max(0, -math.floor(math.log10(step))) if step else 0
+
+        if precision is not None:
+            return compile_number_formatter(f'{{:.{precision}f}}', scale=scale)
+        return str
 
-class DeviceProfileFactory:
-    """Factory to create device profiles."""
-    
     @staticmethod
-    def create_profile(model: str) -> DeviceProfile:
-        search_paths = []
+    def _scale(value: Any, scale: float) -> Any:
+        try:
+            return float(value) * scale
+        except (ValueError, TypeError):
+            return value
 
-        # 开发环境: 直接访问 src/resources/profiles
-        current_dir = Path(__file__).parent
-        search_paths.append(current_dir.parent / 'resources' / 'profiles' / f"{model}.json")
 
+class DeviceProfileFactory:
+    """
+    Factory to create device profiles.
+
+    Profiles are cached per model. The profile directories are scanned once;
+    with hot reload enabled, a cached profile is reloaded when its file's
+    mtime changes. Reload listeners are told which model was reloaded (None
+    for all) so caches built from profiles can be dropped.
+    """
+
+    _lock = RLock()
+    _paths: Optional[Dict[str, Path]] = None  # model -> 配置文件
+    _profiles: Dict[str, DeviceProfile] = {}  # model -> 已加载的配置(包括基础配置)
+    _sources: Dict[str, Tuple[Path, float]] = {}  # model -> (配置文件, 加载时的mtime)
+    _hot_reload = False
+    _last_scan = 0.0
+    _listeners: List[Callable[[Optional[str]], None]] = []
+
+    @staticmethod
+    def _profile_dirs() -> List[Path]:
+        # 开发环境: 直接访问 src/resources/profiles
         # 打包环境: 通过资源路径访问
-        search_paths.append(get_resource_path(f"resources/profiles/{model}.json"))
-        search_paths.append(get_resource_path(f"src/resources/profiles/{model}.json"))
+        return [
+            Path(__file__).parent.parent / 'resources' / 'profiles',
+            get_resource_path("resources/profiles"),
+            get_resource_path("src/resources/profiles"),
+        ]
+
+    @classmethod
+    def scan(cls, hot_reload: bool = None) -> Dict[str, Path]:
+        """
+        Index the profile files in the profile directories by model.
+        Earlier directories take precedence. Called once at startup, or
+        lazily by the first create_profile call.
+        """
+        with cls._lock:
+            if hot_reload is not None:
+                cls._hot_reload = hot_reload
+
+            paths = {}
+            for directory in cls._profile_dirs():
+                try:
+                    files = sorted(directory.glob('*.json')) if directory.is_dir() else []
+                except OSError:
+                    continue
+                for path in files:
+                    paths.setdefault(path.stem, path)
+
+            cls._paths = paths
+            cls._last_scan = time.monotonic()
+            return paths
+
+    @classmethod
+    def add_reload_listener(cls, callback: Callable[[Optional[str]], None]) -> None:
+        """Register a callback invoked with the model whose profile was reloaded, or None for all."""
+        with cls._lock:
+            cls._listeners.append(callback)
+
+    @classmethod
+    def reload(cls) -> None:
+        """Drop all cached profiles and rescan the profile directories."""
+        with cls._lock:
+            cls._profiles.clear()
+            cls._sources.clear()
+            cls.scan()
+        cls._notify(None)
+
+    @classmethod
+    def create_profile(cls, model: str) -> DeviceProfile:
+        with cls._lock:
+            if cls._paths is None:
+                cls.scan()
+
+            profile = cls._profiles.get(model)
+            if profile is not None and not (cls._hot_reload and cls._is_stale(model)):
+                return profile
 
-        for profile_path in search_paths:
+            reloaded = profile is not None
+            profile = cls._profiles[model] = cls._load(model)
+
+        if reloaded:
+            cls._notify(model)
+        return profile
+
+    @classmethod
+    def _notify(cls, model: Optional[str]) -> None:
+        for callback in list(cls._listeners):
+            try:
+                callback(model)
+            except Exception as e:
+                print(f"Error in profile reload listener: {e}")
+
+    @classmethod
+    def _is_stale(cls, model: str) -> bool:
+        source = cls._sources.get(model)
+        if source is None:
+            # 没有配置文件的型号: 定期重新扫描, 发现新增的配置文件
+            if time.monotonic() - cls._last_scan < PROFILE_RESCAN_INTERVAL:
+                return False
+            cls.scan()
+            return model in cls._paths
+
+        path, mtime = source
+        try:
+            return path.stat().st_mtime != mtime
+        except OSError:
+            return True
+
+    @classmethod
+    def _load(cls, model: str) -> DeviceProfile:
+        cls._sources.pop(model, None)
+
+        profile_path = cls._paths.get(model)
+        if profile_path is not None:
             try:
-                if profile_path and profile_path.exists():
-                    with open(profile_path, 'r', encoding='utf-8') as f:
-                        profile_data = json.load(f)
-                        return JsonDeviceProfile(model, profile_data)
+                mtime = profile_path.stat().st_mtime
+                with open(profile_path, 'r', encoding='utf-8') as f:
+                    profile_data = json.load(f)
+                cls._sources[model] = (profile_path, mtime)
+                return JsonDeviceProfile(model, profile_data)
             except Exception as e:
                 print(f"Error loading profile for {model}: {e}")
 
         # Fallback to base profile
         return DeviceProfile(model)
-
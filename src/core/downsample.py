@@ -0,0 +1,147 @@
+"""时间序列降采样模块"""
+from typing import Tuple
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets 降采样
+    
+    保留首尾两点, 其余点均分到 max_points - 2 个桶中, 每个桶选出与
+    前一个选中点、下一个桶均值构成三角形面积最大的点, 能较好地保留曲线形状
+    """
+    length = len(x)
+    if max_points >= length or max_points < 3:
+        return x, y
+    
+    edges = np.linspace(1, length - 1, max_points - 1).astype(np.intp)
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = length - 1
+    
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        
+        # 下一个桶的均值; 最后一个桶以末尾点代替
+        if i < max_points - 3:
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    
+    return x[selected], y[selected]
+
+
+def minmax(x: np.ndarray, y: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    最小/最大值降采样
+    
+    按点数均分为 max_points / 2 个桶, 每个桶按时间顺序保留最小值和最大值,
+    保证尖峰不会在降采样后丢失
+    """
+    length = len(x)
+    if max_points >= length or max_points < 4:
+        return x, y
+    
+    edges = np.linspace(0, length, max_points // 2 + 1).astype(np.intp)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        segment = y[start:end]
+        selected.append(start + int(np.argmin(segment)))
+        selected.append(start + int(np.argmax(segment)))
+    
+    selected = np.unique(selected)
+    return x[selected], y[selected]
+
+
+METHODS = {
+    'lttb': lttb,
+    'minmax': minmax
+}
+
+# 各方法实际降采样所需的最少点数, 低于该值时原样返回
+MIN_POINTS = {
+    'lttb': 3,
+    'minmax': 4
+}
+
+
+def downsample(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int,
+    method: str = 'lttb',
+    gap_threshold: float = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将序列降采样到约 max_points 个点, 并在数据中断处插入NaN断点
+    
+    相邻点间隔超过 gap_threshold 处视为中断, 各连续段按点数比例分配
+    点数后分别降采样, 断点不会被降采样抹掉. 每段至少分到该方法所需的
+    最少点数; 中断过多、点数不够分时只保留最长的若干个中断, 其余的段合并,
+    保证总点数不超过 max_points
+    
+    Args:
+        x: 时间戳(升序)
+        y: 值
+        max_points: 目标点数, 通常为图表的像素宽度
+        method: 'lttb' 或 'minmax'
+        gap_threshold: 断点阈值(秒), 为None时不插入断点
+    
+    Returns:
+        (时间戳数组, 值数组)
+    """
+    reduce = METHODS.get(method)
+    if reduce is None:
+        raise ValueError(f"未知的降采样方法: {method}")
+    
+    min_points = MIN_POINTS[method]
+    max_points = max(int(max_points), min_points)
+    
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    length = len(x)
+    if length == 0:
+        return x, y
+    
+    if gap_threshold is None or length < 2:
+        breaks = np.empty(0, dtype=np.intp)
+    else:
+        dx = np.diff(x)
+        breaks = np.flatnonzero(dx > gap_threshold) + 1
+        
+        # 每段至少 min_points 个点, 段间各占一个断点
+        max_segments = max(1, (max_points + 1) // (min_points + 1))
+        if len(breaks) >= max_segments:
+            widest = np.argsort(dx[breaks - 1], kind='stable')[len(breaks) - (max_segments - 1):]
+            breaks = np.sort(breaks[widest])
+    
+    bounds = np.concatenate(([0], breaks, [length]))
+    segments = len(bounds) - 1
+    # 先为每段保留最少点数, 其余按点数比例分配
+    spare = max_points - (segments - 1) - segments * min_points
+    
+    xs = []
+    ys = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if xs:
+            # 断点紧跟在上一段末尾之后
+            xs.append(np.array([x[start - 1] + 1]))
+            ys.append(np.array([np.nan]))
+        
+        share = min_points + int(spare * (end - start) / length)
+        seg_x, seg_y = reduce(x[start:end], y[start:end], share)
+        xs.append(seg_x)
+        ys.append(seg_y)
+    
+    return np.concatenate(xs), np.concatenate(ys)
@@ -1,9 +1,11 @@
 """设备监控核心模块"""
+import heapq
 import json
+import random
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Tuple, Set
 from threading import Thread, Event, Lock
 from queue import Queue, Empty
 import sys
@@ -15,12 +17,27 @@ if not getattr(sys, 'frozen', False):
 from mijiaAPI import mijiaAPI, mijiaDevice, mijiaLogin
 
 from .database import DatabaseManager
+from .adaptive import AdaptiveIntervals
+from .alerts import AlertEngine, EVENT_FIRED, EVENT_RESOLVED
+from .availability import AvailabilityTracker, EVENT_ONLINE, EVENT_OFFLINE
+from .db_writer import DatabaseWriter
+from .device_profiles import DeviceProfileFactory
+from .recording import SampleRecorder
+from .resilience import (
+    CircuitBreaker, CircuitOpenError, ExponentialBackoff, TimeoutHTTPAdapter,
+    RETRYABLE_ERRORS, ERROR_OTHER, EVENT_OPENED, EVENT_CLOSED, STATE_CLOSED, classify_error
+)
+from .spec_cache import get_spec_cache
 from ..utils.logger import get_logger
 from ..utils.config_loader import ConfigLoader
 from ..utils.path_utils import get_app_path
 
 logger = get_logger(__name__)
 
+# 云端请求重试的初始等待时间与上限(秒), 每次重试加倍
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 10.0
+
 
 class DeviceMonitor:
     """设备监控管理类"""
@@ -38,19 +55,119 @@ class DeviceMonitor:
         self.api: Optional[mijiaAPI] = None
         self.devices: Dict[str, Dict[str, Any]] = {}  # did -> device_info
         self.monitored_devices: Dict[str, mijiaDevice] = {}  # did -> mijiaDevice
+        self.spec_cache = get_spec_cache()  # model -> 可读属性定义
+        
+        # 按设备配置中的记录策略跳过未变化的采样
+        self.recorder = SampleRecorder()
+        
+        # 设备配置热加载后丢弃由配置生成的记录策略与属性格式
+        DeviceProfileFactory.add_reload_listener(self.invalidate_profile_caches)
+        
+        # 设备在线状态: 只在上线/离线状态转换时写库和通知
+        availability = config.get('monitor.availability', {}) or {}
+        self.availability = AvailabilityTracker(
+            failure_threshold=availability.get('failure_threshold', 3),
+            flap_window=availability.get('flap_window', 3600),
+            flap_limit=availability.get('flap_limit', 4),
+            flap_recovery=availability.get('flap_recovery', 3)
+        )
+        
+        # 连续失败的设备按指数退避延长轮询间隔, 一次成功后恢复
+        backoff = config.get('monitor.backoff', {}) or {}
+        self.backoff = ExponentialBackoff(
+            factor=backoff.get('factor', 2),
+            max_interval=backoff.get('max_interval', 3600),
+            jitter=backoff.get('jitter', 0.2)
+        )
+        
+        # 云端熔断: 认证失败或 5xx 等错误持续出现时暂停轮询, 到期后探测恢复
+        breaker = config.get('mijia.circuit_breaker', {}) or {}
+        self.breaker = CircuitBreaker(
+            failure_threshold=breaker.get('failure_threshold', 5),
+            reset_timeout=breaker.get('reset_timeout', 60),
+            max_reset_timeout=breaker.get('max_reset_timeout', 1800)
+        )
+        
+        # 自适应轮询间隔: 值变化或报警时缩短, 平稳时延长; 未启用时为None
+        adaptive = config.get('monitor.adaptive', {}) or {}
+        self.adaptive: Optional[AdaptiveIntervals] = None
+        if adaptive.get('enabled', False):
+            self.adaptive = AdaptiveIntervals(
+                min_interval=adaptive.get('min_interval', 30),
+                max_interval=adaptive.get('max_interval', 900),
+                budget=adaptive.get('budget', 0),
+                shrink=adaptive.get('shrink', 0.5),
+                grow=adaptive.get('grow', 1.25),
+                tolerance=adaptive.get('tolerance', 0.01)
+            )
+        
+        # 报警规则只在启动时编译一次, 按 (设备类型, 属性名) 索引
+        self.alert_engine = AlertEngine(
+            database,
+            config.get('alerts.rules', []) if config.get('alerts.enabled', True) else []
+        )
+        
+        # 采样写入: 经有界队列由写入线程批量落库, 监控线程不等待数据库
+        self.writer = DatabaseWriter(
+            database,
+            batch_size=config.get('performance.batch_size', 1000),
+            flush_interval=config.get('performance.flush_interval', 1000),
+            max_queue_size=config.get('performance.write_queue_size', 10000),
+            retention_days=(
+                config.get('database.retention_days', 30)
+                if config.get('database.auto_cleanup', True) else None
+            ),
+            rollup_retention_days=config.get('database.rollups.retention_days', {})
+        )
         
         self.is_running = False
         self.stop_event = Event()
         self.monitor_threads: List[Thread] = []
-        self.task_queue = Queue()
+        self.task_queue = Queue()    # 调度器 -> 合并器: 到期的设备
+        self.batch_queue = Queue()   # 合并器 -> 工作线程: 打包后的请求批次
         self.lock = Lock()
         
+        # 调度状态: 按下次到期时间排序的最小堆
+        self.schedule_lock = Lock()
+        self._schedule_wakeup = Event()
+        self._schedule_heap: List[Tuple[float, str]] = []  # (到期时间, did)
+        self._next_due: Dict[str, float] = {}              # did -> 有效的到期时间
+        self._last_dispatch: Dict[str, float] = {}         # did -> 上次入队时间
+        self._in_flight: Set[str] = set()                  # 已入队或正在轮询的设备
+        
+        # 监控间隔表: 设备表或配置变更时通过 invalidate_intervals 显式失效
+        self.interval_lock = Lock()
+        self._interval_table: Dict[str, int] = {}  # did -> 监控间隔(秒)
+        self._interval_table_loaded = False
+        self._device_types: Dict[str, str] = {}    # model -> 设备类型
+        self._property_formats: Dict[str, Dict[str, str]] = {}  # model -> {属性名: 格式}
+        
+        # 轮询统计 (云端请求往返次数等)
+        self.metrics_lock = Lock()
+        self.metrics: Dict[str, Any] = {
+            'polls': 0,
+            'devices_polled': 0,
+            'api_round_trips': 0,
+            'properties_requested': 0,
+            'last_poll_round_trips': 0,
+            'last_poll_properties': 0,
+            'skipped_in_flight': 0,
+            'samples_recorded': 0,
+            'samples_skipped': 0,
+            'poll_errors': 0,
+            'api_retries': 0,
+            'breaker_rejections': 0,
+            'offline_transitions': 0,
+            'online_transitions': 0
+        }
+        
         # 回调函数
         self.callbacks: Dict[str, List[Callable]] = {
             'device_update': [],
             'device_offline': [],
             'device_online': [],
             'property_alert': [],
+            'property_alert_resolved': [],
             'error': []
         }
         
@@ -73,10 +190,21 @@ class DeviceMonitor:
             
             self.api = mijiaAPI(auth_data)
             
+            # mijiaAPI 的请求不带超时, 为其会话设置默认超时
+            timeout = self.config.get('mijia.timeout', 10)
+            session = getattr(self.api, 'session', None)
+            if session is not None and timeout:
+                adapter = TimeoutHTTPAdapter(timeout)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+            
             if not self.api.available:
                 logger.error("米家API认证已过期,请重新登录")
                 return False
             
+            # 认证已更新, 之前因认证失败打开的熔断器不再适用
+            self.breaker.reset()
+            
             logger.info("米家API初始化成功")
             return True
             
@@ -175,6 +303,9 @@ class DeviceMonitor:
                     # 保存到数据库
                     self.database.add_or_update_device(device)
             
+            # 设备表已变化, 重新解析监控间隔
+            self.invalidate_intervals()
+            
             return True
             
         except Exception as e:
@@ -222,6 +353,12 @@ class DeviceMonitor:
             
             self.is_running = True
             self.stop_event.clear()
+            self._schedule_wakeup.clear()
+            with self.schedule_lock:
+                self._in_flight.clear()
+            
+            # 启动数据库写入线程
+            self.writer.start()
             
             # 启动工作线程
             worker_count = self.config.get('monitor.worker_threads', 5)
@@ -231,6 +368,12 @@ class DeviceMonitor:
                 thread.start()
                 self.monitor_threads.append(thread)
             
+            # 启动请求合并线程
+            coalescer_thread = Thread(target=self._request_coalescer, name="Monitor-Coalescer")
+            coalescer_thread.daemon = True
+            coalescer_thread.start()
+            self.monitor_threads.append(coalescer_thread)
+            
             # 启动任务调度线程
             scheduler_thread = Thread(target=self._task_scheduler, args=(monitor_list,))
             scheduler_thread.daemon = True
@@ -253,134 +396,660 @@ class DeviceMonitor:
         logger.info("正在停止监控...")
         self.is_running = False
         self.stop_event.set()
+        self._schedule_wakeup.set()
         
         # 等待所有线程结束
         for thread in self.monitor_threads:
             thread.join(timeout=5)
         
         self.monitor_threads.clear()
+        
+        # 轮询线程结束后再停止写入线程, 写完队列中剩余的采样
+        self.writer.stop()
         logger.info("监控已停止")
     
     def _task_scheduler(self, device_ids: List[str]) -> None:
-        """任务调度器"""
-        last_check = {}
+        """
+        任务调度器
+        
+        设备按下次到期时间放入最小堆, 线程只休眠到最近的到期时间;
+        仍在队列中或正在轮询的设备不会被重复入队
+        """
+        now = time.time()
+        with self.schedule_lock:
+            self._schedule_heap = []
+            self._next_due.clear()
+            self._last_dispatch.clear()
+            for did in device_ids:
+                self._next_due[did] = now
+                self._schedule_heap.append((now, did))
+            heapq.heapify(self._schedule_heap)
         
         while self.is_running and not self.stop_event.is_set():
             try:
-                current_time = time.time()
+                # 熔断期间及探测请求完成前不入队任何设备, 探测结束时会被唤醒
+                paused = self.breaker.retry_in()
+                if paused > 0 or self.breaker.is_probing():
+                    self._schedule_wakeup.clear()
+                    if self.stop_event.is_set():
+                        break
+                    self._schedule_wakeup.wait(paused or RETRY_MAX_DELAY)
+                    continue
                 
-                for did in device_ids:
-                    if did not in self.devices:
-                        continue
-                    
-                    device = self.devices[did]
+                due_tasks = []
+                with self.schedule_lock:
+                    self._schedule_wakeup.clear()
+                    now = time.time()
                     
-                    # 获取设备的监控间隔
-                    interval = self._get_device_interval(device)
+                    while self._schedule_heap and self._schedule_heap[0][0] <= now:
+                        due, did = heapq.heappop(self._schedule_heap)
+                        
+                        # 已被重新调度的旧条目
+                        if self._next_due.get(did) != due:
+                            continue
+                        
+                        device = self.devices.get(did)
+                        if device is None:
+                            del self._next_due[did]
+                            continue
+                        
+                        # 保持固定节拍, 落后过多时从当前时间重新计算
+                        interval = self._get_device_interval(device)
+                        next_due = due + interval
+                        if next_due <= now:
+                            next_due = now + interval
+                        self._next_due[did] = next_due
+                        heapq.heappush(self._schedule_heap, (next_due, did))
+                        
+                        if did in self._in_flight:
+                            with self.metrics_lock:
+                                self.metrics['skipped_in_flight'] += 1
+                            continue
+                        
+                        self._in_flight.add(did)
+                        self._last_dispatch[did] = now
+                        due_tasks.append({'did': did, 'device': device})
                     
-                    # 检查是否需要监控
-                    if did not in last_check or current_time - last_check[did] >= interval:
-                        self.task_queue.put({'did': did, 'device': device})
-                        last_check[did] = current_time
+                    timeout = self._schedule_heap[0][0] - now if self._schedule_heap else None
+                
+                for task in due_tasks:
+                    self.task_queue.put(task)
                 
-                # 等待一段时间
-                if self.stop_event.wait(1):
+                if self.stop_event.is_set():
                     break
                 
+                # 休眠到下一个到期时间, 重新调度或停止时会被提前唤醒
+                self._schedule_wakeup.wait(timeout)
+                
             except Exception as e:
                 logger.error(f"任务调度出错: {e}")
                 if self.stop_event.wait(5):
                     break
     
+    def reschedule_device(self, did: str) -> None:
+        """
+        按设备当前的监控间隔重新计算其下次到期时间
+        
+        只影响指定设备, 用于监控间隔变更后立即生效
+        """
+        device = self.devices.get(did)
+        if device is None:
+            return
+        
+        interval = self._get_device_interval(device)
+        
+        with self.schedule_lock:
+            if did not in self._next_due:
+                return
+            
+            now = time.time()
+            next_due = max(self._last_dispatch.get(did, now) + interval, now)
+            self._next_due[did] = next_due
+            heapq.heappush(self._schedule_heap, (next_due, did))
+        
+        self._schedule_wakeup.set()
+    
+    def _defer_devices(self, dids: List[str], delay: float) -> None:
+        """将设备的下次到期时间提前到 delay 秒后(已更早到期的不变)"""
+        with self.schedule_lock:
+            due = time.time() + delay
+            for did in dids:
+                if did in self._next_due and due < self._next_due[did]:
+                    self._next_due[did] = due
+                    heapq.heappush(self._schedule_heap, (due, did))
+        
+        self._schedule_wakeup.set()
+    
+    def _release_devices(self, dids) -> None:
+        """设备轮询结束, 允许调度器再次入队"""
+        with self.schedule_lock:
+            self._in_flight.difference_update(dids)
+    
+    def _request_coalescer(self) -> None:
+        """
+        请求合并器
+        
+        收集同一批次窗口(monitor.batch_window 毫秒)内到期的设备,
+        将它们的属性读取打包成尽量少的请求批次交给工作线程
+        """
+        window = max(0, self.config.get('monitor.batch_window', 200)) / 1000.0
+        
+        while self.is_running and not self.stop_event.is_set():
+            try:
+                tasks = [self.task_queue.get(timeout=1)]
+            except Empty:
+                continue
+            
+            try:
+                # 在窗口期内继续收集到期的设备
+                deadline = time.time() + window
+                while True:
+                    remaining = deadline - time.time()
+                    try:
+                        if remaining > 0:
+                            tasks.append(self.task_queue.get(timeout=remaining))
+                        else:
+                            tasks.append(self.task_queue.get_nowait())
+                    except Empty:
+                        break
+                
+                for batch in self._pack_batches(tasks):
+                    self.batch_queue.put(batch)
+                
+            except Exception as e:
+                logger.error(f"请求合并出错: {e}")
+                self._release_devices(task['did'] for task in tasks)
+            finally:
+                for _ in tasks:
+                    self.task_queue.task_done()
+    
+    def _pack_batches(
+        self,
+        tasks: List[Dict[str, Any]]
+    ) -> List[List[Tuple[str, Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]]]:
+        """
+        将到期设备打包为请求批次
+        
+        按到期顺序装箱, 每个批次的属性总数不超过 monitor.max_batch_size;
+        单个设备的属性不会被拆到两个批次中(除非设备本身就超过上限)
+        
+        Returns:
+            [[(did, device_info, [(属性名, method), ...]), ...], ...]
+        """
+        max_batch = max(1, int(self.config.get('monitor.max_batch_size', 50)))
+        batches = []
+        current = []
+        current_size = 0
+        seen = set()
+        
+        for task in tasks:
+            did = task['did']
+            if did in seen:
+                continue
+            seen.add(did)
+            
+            prop_requests = self._build_property_requests(did, task['device'])
+            if not prop_requests:
+                self._release_devices([did])
+                continue
+            
+            if current and current_size + len(prop_requests) > max_batch:
+                batches.append(current)
+                current = []
+                current_size = 0
+            
+            current.append((did, task['device'], prop_requests))
+            current_size += len(prop_requests)
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
     def _monitor_worker(self) -> None:
         """监控工作线程"""
         while self.is_running and not self.stop_event.is_set():
             try:
-                # 从队列获取任务
-                task = self.task_queue.get(timeout=1)
+                # 从队列获取请求批次
+                batch = self.batch_queue.get(timeout=1)
                 
-                if task:
-                    self._monitor_device(task['did'], task['device'])
+                if batch:
+                    self._poll_batch(batch)
                 
-                self.task_queue.task_done()
+                self.batch_queue.task_done()
                 
             except Empty:
                 continue
             except Exception as e:
                 logger.error(f"监控工作线程出错: {e}")
     
-    def _monitor_device(self, did: str, device_info: Dict[str, Any]) -> None:
-        """监控单个设备"""
+    def _poll_batch(
+        self,
+        batch: List[Tuple[str, Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]]
+    ) -> None:
+        """
+        执行一个请求批次
+        
+        批次内所有设备的属性合并为尽量少的 get_devices_prop 请求,
+        结果再按 did/属性 拆分回各设备做后续处理
+        
+        Args:
+            batch: [(did, device_info, [(属性名, method), ...]), ...]
+        """
+        deferred = []
         try:
-            # 获取设备属性
-            model = device_info.get('model')
-            if not model:
+            requests = [
+                (did, prop_name, method)
+                for did, _, prop_requests in batch
+                for prop_name, method in prop_requests
+            ]
+            if not requests:
                 return
             
-            # 尝试获取设备的属性定义
+            results, errored, round_trips = self._fetch_properties(requests)
+            self._record_poll_metrics(len(batch), len(requests), round_trips)
+            logger.debug(
+                f"轮询 {len(batch)} 个设备: {len(requests)} 个属性, {round_trips} 次请求"
+            )
+            
+            for did, device_info, _ in batch:
+                # 请求本身失败(云端错误)时无法判断设备是否在线, 不计入失败次数
+                if did in errored and did not in results:
+                    deferred.append(did)
+                    continue
+                self._process_device_properties(did, device_info, results.get(did, {}))
+        finally:
+            self._release_devices(did for did, _, _ in batch)
+        
+        # 熔断期间未能请求的设备在熔断到期后重新轮询, 不等待完整间隔
+        if deferred and self.breaker.state != STATE_CLOSED:
+            self._defer_devices(deferred, self.breaker.retry_in())
+    
+    def _build_property_requests(
+        self,
+        did: str,
+        device_info: Dict[str, Any]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        构建设备所有可读属性的请求参数
+        
+        Returns:
+            [(属性名, method), ...], method 为 get_devices_prop 的单项参数
+        """
+        model = device_info.get('model')
+        if not model:
+            return []
+        
+        prop_requests = self.spec_cache.get_property_requests(did, model)
+        if not prop_requests:
+            logger.debug(f"无法获取设备 {device_info.get('name', did)} 的属性定义")
+        
+        return prop_requests
+    
+    def _fetch_properties(
+        self,
+        requests: List[Tuple[str, str, Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Set[str], int]:
+        """
+        批量获取属性值
+        
+        按 monitor.max_batch_size 切分请求, 每批一次 get_devices_prop 调用
+        
+        Args:
+            requests: [(did, 属性名, method), ...]
+            
+        Returns:
+            ({did: {属性名: 值}}, 请求失败的设备ID, 云端请求次数)
+        """
+        max_batch = max(1, int(self.config.get('monitor.max_batch_size', 50)))
+        results: Dict[str, Dict[str, Any]] = {}
+        errored: Set[str] = set()
+        round_trips = 0
+        
+        for start in range(0, len(requests), max_batch):
+            chunk = requests[start:start + max_batch]
+            round_trips += 1
+            
             try:
-                from mijiaAPI import get_device_info
-                dev_spec = get_device_info(model)
-            except Exception:
-                logger.debug(f"无法获取设备 {device_info['name']} 的属性定义")
-                return
+                response = self._call_api(self.api.get_devices_prop, [method for _, _, method in chunk])
+            except CircuitOpenError:
+                errored.update(did for did, _, _ in chunk)
+                with self.metrics_lock:
+                    self.metrics['breaker_rejections'] += 1
+                continue
+            except Exception as e:
+                logger.warning(f"批量获取属性失败 ({len(chunk)} 项): {e}")
+                errored.update(did for did, _, _ in chunk)
+                with self.metrics_lock:
+                    self.metrics['poll_errors'] += 1
+                continue
             
-            # 获取所有可读属性
-            properties = {}
-            for prop in dev_spec.get('properties', []):
-                if 'r' in prop.get('rw', ''):
-                    try:
-                        prop_name = prop['name']
-                        method = prop['method'].copy()
-                        method['did'] = did
-                        
-                        result = self.api.get_devices_prop([method])
-                        if result and result[0].get('code') == 0:
-                            properties[prop_name] = result[0].get('value')
-                            
-                            # 保存属性到数据库
-                            self.database.add_device_property(
-                                did, prop_name, result[0].get('value')
-                            )
-                    except Exception:
-                        continue
-            
-            # 保存设备状态
-            if properties:
-                self.database.add_device_status(did, properties, online=True)
+            # 按 (did, siid, piid) 将结果映射回请求, 缺少字段时按顺序对应
+            lookup = {
+                (str(method['did']), method.get('siid'), method.get('piid')): (did, prop_name)
+                for did, prop_name, method in chunk
+            }
+            for idx, item in enumerate(response or []):
+                target = lookup.get((str(item.get('did')), item.get('siid'), item.get('piid')))
+                if target is None and idx < len(chunk):
+                    target = chunk[idx][:2]
+                if target is None or item.get('code') != 0:
+                    continue
+                
+                did, prop_name = target
+                results.setdefault(did, {})[prop_name] = item.get('value')
+        
+        return results, errored, round_trips
+    
+    def _call_api(self, func: Callable, *args) -> Any:
+        """
+        经熔断器调用云端接口
+        
+        超时、连接错误和 5xx 按 mijia.retry 重试(指数退避加抖动); 认证失败和云端拒绝
+        不重试, 但计入熔断; 熔断器打开时抛出 CircuitOpenError, 不发出请求
+        """
+        retries = max(0, int(self.config.get('mijia.retry', 3)))
+        
+        for attempt in range(retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("云端请求已熔断")
+            
+            try:
+                result = func(*args)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind == ERROR_OTHER:
+                    # 与云端状态无关的错误(如结果解析失败)
+                    self._record_breaker_success()
+                    raise
+                
+                opened = self.breaker.record_failure(kind) == EVENT_OPENED
+                if opened:
+                    retry_in = self.breaker.retry_in()
+                    logger.warning(f"云端请求连续失败({kind}), 暂停轮询 {retry_in:.0f} 秒: {e}")
+                    self._trigger_callback('error', {
+                        'type': 'circuit_open', 'kind': kind, 'message': str(e), 'retry_in': retry_in
+                    })
+                    # 唤醒调度器按新的熔断到期时间休眠
+                    self._schedule_wakeup.set()
                 
-                # 触发回调
-                self._trigger_callback('device_update', {
-                    'did': did,
-                    'device': device_info,
-                    'properties': properties
-                })
+                if opened or kind not in RETRYABLE_ERRORS or attempt >= retries:
+                    raise
                 
-                # 检查报警规则
-                self._check_alerts(did, device_info, properties)
+                with self.metrics_lock:
+                    self.metrics['api_retries'] += 1
+                delay = min(RETRY_BASE_DELAY * 2 ** attempt, RETRY_MAX_DELAY)
+                if self.stop_event.wait(random.uniform(delay / 2, delay)):
+                    raise
+                continue
+            
+            self._record_breaker_success()
+            return result
+    
+    def _record_breaker_success(self) -> None:
+        """记录一次云端有响应的请求, 探测成功时恢复轮询"""
+        if self.breaker.record_success() == EVENT_CLOSED:
+            logger.info("云端请求已恢复, 继续轮询")
+            self._schedule_wakeup.set()
+    
+    def _record_poll_metrics(self, device_count: int, property_count: int, round_trips: int) -> None:
+        """记录一次轮询的请求统计"""
+        with self.metrics_lock:
+            self.metrics['polls'] += 1
+            self.metrics['devices_polled'] += device_count
+            self.metrics['api_round_trips'] += round_trips
+            self.metrics['properties_requested'] += property_count
+            self.metrics['last_poll_round_trips'] = round_trips
+            self.metrics['last_poll_properties'] = property_count
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取监控统计信息的快照(含数据库写入队列统计)"""
+        with self.metrics_lock:
+            metrics = dict(self.metrics)
+        metrics['writer'] = self.writer.get_metrics()
+        metrics['availability'] = self.availability.get_summary()
+        metrics['circuit'] = self.breaker.get_state()
+        metrics['adaptive'] = self.adaptive.get_metrics() if self.adaptive is not None else None
+        return metrics
+    
+    def _process_device_properties(
+        self,
+        did: str,
+        device_info: Dict[str, Any],
+        properties: Dict[str, Any]
+    ) -> None:
+        """处理单个设备的轮询结果: 在线状态、存储、回调与报警检查"""
+        now = time.time()
+        try:
+            if not properties:
+                # 设备未返回任何属性, 记为一次失败
+                self._record_failure(did, device_info, now)
+                return
+            
+            backing_off = self.availability.consecutive_failures(did) > 0
+            if self.availability.record_success(did, now) == EVENT_ONLINE:
+                logger.info(f"设备 {device_info.get('name', did)} 恢复在线")
+                self.recorder.reset(did)
+                with self.metrics_lock:
+                    self.metrics['online_transitions'] += 1
+                self._trigger_callback('device_online', {'did': did, 'device': device_info})
+            
+            # 退避中的设备探测成功, 恢复正常间隔
+            if backing_off:
+                self.reschedule_device(did)
+            
+            # 属性与状态放入写入队列, 由写入线程批量落库
+            model = device_info.get('model', '')
+            formats = self._get_property_formats(model)
+            recorded = 0
+            for prop_name, value in properties.items():
+                record = self.recorder.should_record(did, model, prop_name, value, now)
+                recorded += record
+                self.writer.add_device_property(
+                    did, prop_name, value, formats.get(prop_name), record_history=record
+                )
+            
+            with self.metrics_lock:
+                self.metrics['samples_recorded'] += recorded
+                self.metrics['samples_skipped'] += len(properties) - recorded
+            
+            self.writer.add_device_status(did, properties, online=True)
+            
+            # 触发回调
+            self._trigger_callback('device_update', {
+                'did': did,
+                'device': device_info,
+                'properties': properties,
+                'timestamp': now
+            })
+            
+            # 检查报警规则
+            alert_events = self._check_alerts(did, device_info, properties, now)
+            
+            if self.adaptive is not None:
+                self._adapt_interval(did, device_info, properties, bool(alert_events))
             
         except Exception as e:
             logger.error(f"监控设备 {device_info.get('name', did)} 失败: {e}")
-            
-            # 记录设备离线
-            self.database.add_device_status(did, {}, online=False)
-            self._trigger_callback('device_offline', {'did': did, 'device': device_info})
+            self._record_failure(did, device_info, now)
+    
+    def _adapt_interval(
+        self,
+        did: str,
+        device_info: Dict[str, Any],
+        properties: Dict[str, Any],
+        alerted: bool
+    ) -> None:
+        """按本次采样调整自适应间隔; 间隔缩短时立即重新调度"""
+        device_type = self._get_device_type(device_info.get('model', ''))
+        urgent = alerted or self.alert_engine.is_engaged(did, device_type)
+        
+        before, after = self.adaptive.observe(
+            did, self._get_static_interval(device_info), properties, urgent
+        )
+        if after < before:
+            self.reschedule_device(did)
+    
+    def _record_failure(self, did: str, device_info: Dict[str, Any], now: float) -> None:
+        """记录一次轮询失败并按退避间隔重新调度; 连续失败达到阈值时才写入离线状态并通知"""
+        event = self.availability.record_failure(did, now)
+        self.reschedule_device(did)
+        if event != EVENT_OFFLINE:
+            return
+        
+        logger.warning(f"设备 {device_info.get('name', did)} 已离线")
+        self.writer.add_device_status(did, {}, online=False)
+        self.recorder.reset(did)
+        with self.metrics_lock:
+            self.metrics['offline_transitions'] += 1
+        self._trigger_callback('device_offline', {'did': did, 'device': device_info})
     
     def _get_device_interval(self, device: Dict[str, Any]) -> int:
-        """获取设备的监控间隔"""
-        # 从数据库获取自定义间隔
-        db_device = self.database.get_device(device['did'])
+        """获取设备的监控间隔; 启用自适应调度时以静态间隔为起点动态调整, 连续失败时按退避延长"""
+        interval = self._get_static_interval(device)
+        if self.adaptive is not None:
+            interval = self.adaptive.get_interval(device['did'], interval)
+        
+        failures = self.availability.consecutive_failures(device['did'])
+        if failures:
+            return self.backoff.get_interval(interval, failures)
+        return interval
+    
+    def _get_static_interval(self, device: Dict[str, Any]) -> int:
+        """获取设备配置的静态监控间隔(查内存间隔表)"""
+        did = device['did']
+        
+        with self.interval_lock:
+            if not self._interval_table_loaded:
+                self._load_interval_table()
+            
+            interval = self._interval_table.get(did)
+            if interval is None:
+                # 间隔表加载后新增的设备, 单独解析一次
+                interval = self._resolve_interval(device, self.database.get_device(did))
+                self._interval_table[did] = interval
+        
+        return interval
+    
+    def _load_interval_table(self) -> None:
+        """一次性解析所有设备的监控间隔(调用方需持有 interval_lock)"""
+        db_devices = {row['did']: row for row in self.database.get_all_devices()}
+        
+        self._interval_table = {
+            did: self._resolve_interval(device, db_devices.get(did))
+            for did, device in list(self.devices.items())
+        }
+        self._interval_table_loaded = True
+    
+    def _resolve_interval(
+        self,
+        device: Dict[str, Any],
+        db_device: Optional[Dict[str, Any]]
+    ) -> int:
+        """按 设备自定义间隔 > 设备类型间隔 > 默认间隔 的顺序解析监控间隔"""
+        # 数据库中的自定义间隔
         if db_device and db_device.get('monitor_interval'):
             return db_device['monitor_interval']
         
         # 根据设备类型获取间隔
-        device_type = self._get_device_type(device['model'])
+        device_type = self._get_device_type(device.get('model', ''))
         intervals = self.config.get('monitor.device_intervals', {})
         
         return intervals.get(device_type, self.config.get('monitor.default_interval', 60))
     
+    def invalidate_intervals(self, did: str = None) -> None:
+        """
+        使监控间隔表失效
+        
+        设备表或 monitor.* 配置变更后调用, 受影响设备会按新间隔重新调度
+        
+        Args:
+            did: 只失效指定设备, 为None则失效全部
+        """
+        with self.interval_lock:
+            if did is None:
+                self._interval_table.clear()
+                self._interval_table_loaded = False
+            else:
+                self._interval_table.pop(did, None)
+        
+        # 自适应间隔从新的静态间隔重新开始
+        if self.adaptive is not None:
+            self.adaptive.reset(did)
+        
+        if self.is_running:
+            with self.schedule_lock:
+                targets = [did] if did is not None else list(self._next_due.keys())
+            for target in targets:
+                self.reschedule_device(target)
+    
+    def set_device_interval(self, did: str, interval: int) -> bool:
+        """
+        设置设备的自定义监控间隔
+        
+        Args:
+            did: 设备ID
+            interval: 监控间隔(秒)
+        
+        Returns:
+            是否成功
+        """
+        if not self.database.set_device_monitor_interval(did, interval):
+            return False
+        
+        self.invalidate_intervals(did)
+        return True
+    
+    def invalidate_profile_caches(self, model: str = None) -> None:
+        """
+        清除由设备配置生成的缓存(记录策略、属性格式)
+        
+        Args:
+            model: 只清除指定型号, 为None则清除全部
+        """
+        self.recorder.clear_policies(model)
+        if model is None:
+            self._property_formats.clear()
+        else:
+            self._property_formats.pop(model, None)
+        logger.info(f"设备配置已重新加载: {model or '全部型号'}")
+    
     def _get_device_type(self, model: str) -> str:
         """根据model判断设备类型"""
+        device_type = self._device_types.get(model)
+        if device_type is None:
+            device_type = self._classify_model(model)
+            self._device_types[model] = device_type
+        return device_type
+    
+    def _get_property_formats(self, model: str) -> Dict[str, str]:
+        """
+        获取型号各属性的格式, 决定数值按 INTEGER 还是 REAL 存储
+        
+        设备配置(profile)中的 format 优先, 其次为 MIoT spec 中的定义
+        """
+        formats = self._property_formats.get(model)
+        if formats is not None:
+            return formats
+        
+        formats = {}
+        spec = self.spec_cache.get(model)
+        if spec:
+            for prop in spec['properties']:
+                if prop.get('format'):
+                    formats[prop['name']] = prop['format']
+        
+        profile = DeviceProfileFactory.create_profile(model)
+        for name, prop in getattr(profile, 'property_map', {}).items():
+            if prop.get('format'):
+                formats[name] = prop['format']
+        
+        self._property_formats[model] = formats
+        return formats
+    
+    @staticmethod
+    def _classify_model(model: str) -> str:
+        """按型号字符串匹配设备类型"""
         model_lower = model.lower()
         
         if 'sensor' in model_lower or 'miaomiaoce' in model_lower:
@@ -400,68 +1069,31 @@ class DeviceMonitor:
         self,
         did: str,
         device_info: Dict[str, Any],
-        properties: Dict[str, Any]
-    ) -> None:
-        """检查报警规则"""
-        alert_rules = self.config.get('alerts.rules', [])
-        
-        if not self.config.get('alerts.enabled', True):
-            return
+        properties: Dict[str, Any],
+        now: float
+    ) -> List[Dict[str, Any]]:
+        """
+        检查报警规则, 只在报警触发或恢复时写入数据库并通知
         
+        Returns:
+            本次发生的报警事件
+        """
         device_type = self._get_device_type(device_info['model'])
         
-        for rule in alert_rules:
-            if not rule.get('enabled', True):
-                continue
-            
-            if rule.get('device_type') != device_type:
-                continue
-            
-            prop_name = rule.get('property')
-            if prop_name not in properties:
-                continue
-            
-            value = properties[prop_name]
-            condition = rule.get('condition')
-            threshold = rule.get('threshold')
-            
-            triggered = False
-            if condition == '>' and value > threshold:
-                triggered = True
-            elif condition == '<' and value < threshold:
-                triggered = True
-            elif condition == '==' and value == threshold:
-                triggered = True
-            elif condition == '>=' and value >= threshold:
-                triggered = True
-            elif condition == '<=' and value <= threshold:
-                triggered = True
-            
-            if triggered:
-                alert_title = f"{device_info['name']} - {rule['name']}"
-                alert_message = (
-                    f"属性 {prop_name} 的值为 {value}, "
-                    f"触发条件: {condition} {threshold}"
-                )
-                
-                self.database.add_alert(
-                    did, 'property_alert', alert_title, alert_message, 'WARNING'
-                )
-                
-                self._trigger_callback('property_alert', {
-                    'did': did,
-                    'device': device_info,
-                    'rule': rule,
-                    'property': prop_name,
-                    'value': value
-                })
+        events = self.alert_engine.evaluate(did, device_type, device_info, properties, now)
+        for event in events:
+            if event['event'] == EVENT_FIRED:
+                self._trigger_callback('property_alert', event)
+            elif event['event'] == EVENT_RESOLVED:
+                self._trigger_callback('property_alert_resolved', event)
+        return events
     
     def register_callback(self, event: str, callback: Callable) -> None:
         """
         注册回调函数
         
         Args:
-            event: 事件类型 (device_update, device_offline, device_online, property_alert, error)
+            event: 事件类型 (device_update, device_offline, device_online, property_alert, property_alert_resolved, error)
             callback: 回调函数
         """
         if event in self.callbacks:
@@ -0,0 +1,135 @@
+"""属性采样记录策略模块"""
+import math
+from threading import Lock
+from typing import Dict, Any, Optional, Tuple
+
+from .device_profiles import DeviceProfileFactory
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 记录模式: 每次都记录 / 值变化时记录 / 变化超过死区时记录
+MODE_ALWAYS = 'always'
+MODE_CHANGE = 'change'
+MODE_DEADBAND = 'deadband'
+RECORDING_MODES = (MODE_ALWAYS, MODE_CHANGE, MODE_DEADBAND)
+
+
+def compile_policy(raw: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    校验并规范化设备配置中的记录策略
+    
+    Args:
+        raw: {mode, absolute, relative, heartbeat}
+    
+    Returns:
+        规范化后的策略; 未配置或为 always 模式时返回None(每次都记录)
+    """
+    if not raw:
+        return None
+    
+    mode = raw.get('mode', MODE_CHANGE)
+    if mode not in RECORDING_MODES:
+        logger.warning(f"未知的记录模式 {mode}, 将每次记录")
+        return None
+    if mode == MODE_ALWAYS:
+        return None
+    
+    return {
+        'mode': mode,
+        'absolute': float(raw.get('absolute') or 0),
+        'relative': float(raw.get('relative') or 0),
+        'heartbeat': float(raw.get('heartbeat') or 0)  # 0 表示不强制定期记录
+    }
+
+
+class SampleRecorder:
+    """
+    按属性记录策略决定采样是否写入历史
+    
+    被跳过的采样仍会更新最新值表, 只是不写入历史;
+    图表按"上一个值一直保持到下一次记录"的方式绘制稀疏数据
+    """
+    
+    def __init__(self):
+        self._policies: Dict[str, Dict[str, Dict[str, Any]]] = {}  # model -> {属性名: 策略}
+        self._last: Dict[Tuple[str, str], Tuple[Any, float]] = {}  # (did, 属性名) -> (值, 时间)
+        self._lock = Lock()
+    
+    def get_policies(self, model: str) -> Dict[str, Dict[str, Any]]:
+        """获取型号的记录策略(按型号缓存)"""
+        policies = self._policies.get(model)
+        if policies is None:
+            profile = DeviceProfileFactory.create_profile(model)
+            policies = {}
+            for name in getattr(profile, 'property_map', {}):
+                policy = compile_policy(profile.get_recording_policy(name))
+                if policy:
+                    policies[name] = policy
+            self._policies[model] = policies
+        return policies
+    
+    def should_record(self, did: str, model: str, property_name: str, value: Any, now: float) -> bool:
+        """
+        判断采样是否需要写入历史
+        
+        Args:
+            did: 设备ID
+            model: 设备型号
+            property_name: 属性名
+            value: 属性值
+            now: 采样时间(Unix时间戳)
+        """
+        policy = self.get_policies(model).get(property_name)
+        if policy is None:
+            return True
+        
+        key = (did, property_name)
+        with self._lock:
+            last = self._last.get(key)
+            if last is None or self._changed(policy, last[0], value) or (
+                policy['heartbeat'] and now - last[1] >= policy['heartbeat']
+            ):
+                self._last[key] = (value, now)
+                return True
+            return False
+    
+    @staticmethod
+    def _changed(policy: Dict[str, Any], last_value: Any, value: Any) -> bool:
+        """按策略判断值是否发生了需要记录的变化"""
+        if policy['mode'] == MODE_DEADBAND:
+            try:
+                last_number = float(last_value)
+                number = float(value)
+            except (ValueError, TypeError):
+                return value != last_value
+            
+            if math.isnan(number) or math.isnan(last_number):
+                return not (math.isnan(number) and math.isnan(last_number))
+            
+            # 死区取绝对值与相对比例中较大者, 相对死区在零值附近由绝对死区兜底
+            deadband = max(policy['absolute'], policy['relative'] * abs(last_number))
+            delta = abs(number - last_number)
+            return delta >= deadband if deadband > 0 else delta > 0
+        
+        return value != last_value
+    
+    def reset(self, did: str = None) -> None:
+        """
+        清除记录状态, 下一次采样必定写入历史
+        
+        设备离线或重新上线时调用, 避免离线期间被当作值未变化
+        """
+        with self._lock:
+            if did is None:
+                self._last.clear()
+            else:
+                for key in [key for key in self._last if key[0] == did]:
+                    del self._last[key]
+    
+    def clear_policies(self, model: str = None) -> None:
+        """设备配置变更后重新加载记录策略, model 为None时清除全部型号"""
+        if model is None:
+            self._policies.clear()
+        else:
+            self._policies.pop(model, None)
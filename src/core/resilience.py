@@ -0,0 +1,250 @@
+"""云端请求容错模块: 请求超时、失败退避与熔断"""
+import random
+import time
+from threading import Lock
+from typing import Dict, Any, Optional
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 云端错误分类
+ERROR_AUTH = 'auth'            # 401/403 或会话过期, 认证失效
+ERROR_SERVER = 'server'        # 5xx 或 429, 云端故障或限流
+ERROR_NETWORK = 'network'      # 超时或连接失败
+ERROR_REJECTED = 'rejected'    # 云端返回错误码(code 非 0), 拒绝了请求
+ERROR_OTHER = 'other'          # 其他错误(如结果解析失败), 不计入熔断
+
+# mijiaAPI 在返回的 code 非 0 时抛出普通 Exception, 消息以此开头
+API_REJECTED_PREFIX = '获取数据失败'
+
+# 云端拒绝消息中表示登录失效的关键字(小写)
+AUTH_KEYWORDS = ('auth', 'token', 'login', 'session', 'expired', '认证', '登录', '过期', '失效')
+
+# 可以重试的错误
+RETRYABLE_ERRORS = (ERROR_SERVER, ERROR_NETWORK)
+
+# 熔断器状态: 正常 / 熔断中 / 熔断到期后放行一次探测请求
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# 熔断器事件
+EVENT_OPENED = 'opened'
+EVENT_CLOSED = 'closed'
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时拒绝发出请求"""
+
+
+def classify_error(error: Exception) -> str:
+    """
+    按异常判断云端错误类型
+    
+    mijiaAPI 在 HTTP 状态码非 200 时抛出带 code 属性的 PostDataError;
+    返回的 code 非 0 时抛出普通 Exception, 只能按消息判断, 含登录失效关键字的按认证失败处理
+    """
+    if isinstance(error, (Timeout, RequestsConnectionError)):
+        return ERROR_NETWORK
+    
+    status = getattr(error, 'code', None)
+    if not isinstance(status, int):
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+    
+    if status in (401, 403):
+        return ERROR_AUTH
+    if isinstance(status, int) and (status >= 500 or status == 429):
+        return ERROR_SERVER
+    
+    message = str(error)
+    if message.startswith(API_REJECTED_PREFIX):
+        if any(keyword in message.lower() for keyword in AUTH_KEYWORDS):
+            return ERROR_AUTH
+        return ERROR_REJECTED
+    return ERROR_OTHER
+
+
+def jittered(delay: float, jitter: float) -> float:
+    """在 delay 上下 jitter 比例内随机取值, 避免失败的请求同时重试"""
+    if jitter <= 0:
+        return delay
+    return delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """为未指定超时的请求设置默认超时, mijiaAPI 发出的请求均不带超时"""
+    
+    def __init__(self, timeout: float, *args, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+    
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class ExponentialBackoff:
+    """
+    连续失败设备的轮询间隔退避
+    
+    第 n 次连续失败后间隔为 interval * factor^n, 不超过 max_interval(且不短于正常间隔),
+    并加入随机抖动; 一次成功后由调用方恢复正常间隔
+    """
+    
+    def __init__(self, factor: float = 2.0, max_interval: float = 3600, jitter: float = 0.2):
+        """
+        Args:
+            factor: 每次失败的间隔放大倍数
+            max_interval: 退避间隔上限(秒)
+            jitter: 随机抖动比例(0~1)
+        """
+        self.factor = max(1.0, float(factor))
+        self.max_interval = max(1.0, float(max_interval))
+        self.jitter = min(max(float(jitter), 0.0), 1.0)
+    
+    def get_interval(self, interval: float, failures: int) -> int:
+        """
+        Args:
+            interval: 正常轮询间隔(秒)
+            failures: 连续失败次数
+        """
+        if failures <= 0:
+            return int(interval)
+        
+        # 限制指数, 避免失败次数很大时浮点溢出
+        delay = jittered(interval * self.factor ** min(failures, 32), self.jitter)
+        return int(round(max(min(delay, self.max_interval), interval)))
+
+
+class CircuitBreaker:
+    """
+    云端请求熔断器
+    
+    认证失败、云端拒绝、5xx 或网络错误连续达到 failure_threshold 次后熔断, reset_timeout 秒内拒绝所有请求;
+    到期后放行一次探测请求, 成功则恢复正常, 失败则重新熔断且等待时间加倍(不超过 max_reset_timeout)
+    """
+    
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60,
+        max_reset_timeout: float = 1800
+    ):
+        """
+        Args:
+            failure_threshold: 触发熔断的连续失败次数
+            reset_timeout: 首次熔断的等待时间(秒)
+            max_reset_timeout: 熔断等待时间上限(秒)
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = max(1.0, float(reset_timeout))
+        self.max_reset_timeout = max(self.reset_timeout, float(max_reset_timeout))
+        
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._timeout = self.reset_timeout  # 当前熔断等待时间
+        self._open_until = 0.0              # 熔断到期时间(monotonic)
+        self._probing = False               # 半开状态下探测请求是否已发出
+        self._last_error: Optional[str] = None
+        self._opened = 0
+        self._lock = Lock()
+    
+    @property
+    def state(self) -> str:
+        return self._state
+    
+    def allow(self) -> bool:
+        """是否允许发出请求; 熔断到期后只放行一个探测请求"""
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+            
+            if self._state == STATE_OPEN:
+                if time.monotonic() < self._open_until:
+                    return False
+                self._state = STATE_HALF_OPEN
+                self._probing = False
+            
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+    
+    def is_probing(self) -> bool:
+        """探测请求是否正在进行"""
+        with self._lock:
+            return self._state == STATE_HALF_OPEN and self._probing
+    
+    def retry_in(self) -> float:
+        """距离熔断到期的秒数, 未熔断时为0"""
+        with self._lock:
+            if self._state != STATE_OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+    
+    def record_success(self) -> Optional[str]:
+        """
+        记录一次云端有响应的请求
+        
+        Returns:
+            探测成功恢复正常时返回 EVENT_CLOSED, 否则返回None
+        """
+        with self._lock:
+            self._failures = 0
+            if self._state == STATE_CLOSED:
+                return None
+            
+            self._state = STATE_CLOSED
+            self._timeout = self.reset_timeout
+            self._probing = False
+            return EVENT_CLOSED
+    
+    def record_failure(self, kind: str) -> Optional[str]:
+        """
+        记录一次认证失败、云端拒绝、5xx 或网络错误
+        
+        Returns:
+            进入熔断状态时返回 EVENT_OPENED, 否则返回None
+        """
+        with self._lock:
+            self._failures += 1
+            self._last_error = kind
+            
+            if self._state == STATE_HALF_OPEN:
+                # 探测失败, 熔断等待时间加倍
+                self._timeout = min(self._timeout * 2, self.max_reset_timeout)
+            elif self._state == STATE_OPEN or self._failures < self.failure_threshold:
+                return None
+            
+            self._state = STATE_OPEN
+            self._probing = False
+            self._open_until = time.monotonic() + jittered(self._timeout, 0.1)
+            self._opened += 1
+            return EVENT_OPENED
+    
+    def get_state(self) -> Dict[str, Any]:
+        """熔断器状态快照"""
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                'state': self._state,
+                'failures': self._failures,
+                'opened': self._opened,
+                'retry_in': round(retry_in, 1),
+                'reset_timeout': self._timeout,
+                'last_error': self._last_error
+            }
+    
+    def reset(self) -> None:
+        """恢复正常状态, 重新登录后调用"""
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._timeout = self.reset_timeout
+            self._probing = False
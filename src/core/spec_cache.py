@@ -0,0 +1,169 @@
+"""设备属性定义缓存模块"""
+import json
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Any, Optional, Tuple
+
+from ..utils.logger import get_logger
+from ..utils.path_utils import get_app_path
+
+logger = get_logger(__name__)
+
+# 缓存文件格式版本, 结构变化时递增以丢弃旧缓存
+CACHE_VERSION = 1
+
+# 获取失败的型号在该时间(秒)内不再重试
+FAILURE_RETRY_INTERVAL = 600
+
+
+class DeviceSpecCache:
+    """
+    按型号缓存的设备属性定义
+
+    型号的属性定义在运行期间不会变化, 因此只解析一次:
+    预先筛选出可读属性并生成 get_devices_prop 的请求模板,
+    结果同时持久化到磁盘, 冷启动时无需重新解析每个型号
+    """
+
+    def __init__(self, cache_file: Path):
+        """
+        初始化属性定义缓存
+
+        Args:
+            cache_file: 持久化缓存文件路径
+        """
+        self.cache_file = Path(cache_file)
+        self._specs: Dict[str, Dict[str, Any]] = {}  # model -> spec entry
+        self._failures: Dict[str, float] = {}        # model -> 上次失败时间
+        self._lock = Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """从磁盘加载缓存"""
+        if not self.cache_file.exists():
+            return
+
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if data.get('version') != CACHE_VERSION:
+                logger.info("属性定义缓存版本不匹配, 已忽略")
+                return
+
+            self._specs = data.get('models', {})
+            logger.debug(f"已加载 {len(self._specs)} 个型号的属性定义缓存")
+        except Exception as e:
+            logger.warning(f"加载属性定义缓存失败: {e}")
+
+    def _save(self) -> None:
+        """将缓存写入磁盘(调用方需持有锁)"""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'version': CACHE_VERSION, 'models': self._specs},
+                    f, ensure_ascii=False, indent=2
+                )
+            tmp_file.replace(self.cache_file)
+        except Exception as e:
+            logger.warning(f"保存属性定义缓存失败: {e}")
+
+    @staticmethod
+    def _compile_spec(dev_spec: Dict[str, Any]) -> Dict[str, Any]:
+        """从 get_device_info 的结果中提取可读属性及请求模板"""
+        properties = []
+        for prop in dev_spec.get('properties', []):
+            if 'r' not in (prop.get('rw') or ''):
+                continue
+            method = prop.get('method') or {}
+            if 'siid' not in method or 'piid' not in method:
+                continue
+            properties.append({
+                'name': prop['name'],
+                'format': prop.get('type') or prop.get('format'),
+                'siid': method['siid'],
+                'piid': method['piid']
+            })
+        return {'properties': properties}
+
+    def get(self, model: str) -> Optional[Dict[str, Any]]:
+        """
+        获取型号的可读属性定义
+
+        Args:
+            model: 设备型号
+
+        Returns:
+            {'properties': [{name, format, siid, piid}, ...]}, 无法获取时返回None
+        """
+        spec = self._specs.get(model)
+        if spec is not None:
+            return spec
+
+        with self._lock:
+            # 双重检查, 避免多个线程同时解析同一型号
+            spec = self._specs.get(model)
+            if spec is not None:
+                return spec
+
+            failed_at = self._failures.get(model)
+            if failed_at is not None and time.time() - failed_at < FAILURE_RETRY_INTERVAL:
+                return None
+
+            try:
+                from mijiaAPI import get_device_info
+                dev_spec = get_device_info(model)
+            except Exception as e:
+                logger.debug(f"无法获取型号 {model} 的属性定义: {e}")
+                self._failures[model] = time.time()
+                return None
+
+            spec = self._compile_spec(dev_spec)
+            self._specs[model] = spec
+            self._failures.pop(model, None)
+            self._save()
+            return spec
+
+    def get_property_requests(self, did: str, model: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        生成设备所有可读属性的请求参数
+
+        Returns:
+            [(属性名, method), ...], method 为 get_devices_prop 的单项参数
+        """
+        spec = self.get(model)
+        if not spec:
+            return []
+
+        return [
+            (prop['name'], {'did': did, 'siid': prop['siid'], 'piid': prop['piid']})
+            for prop in spec['properties']
+        ]
+
+    def clear(self) -> None:
+        """清空缓存(包括磁盘文件)"""
+        with self._lock:
+            self._specs.clear()
+            self._failures.clear()
+            try:
+                if self.cache_file.exists():
+                    self.cache_file.unlink()
+            except Exception as e:
+                logger.warning(f"删除属性定义缓存失败: {e}")
+
+
+_spec_cache: Optional[DeviceSpecCache] = None
+_spec_cache_lock = Lock()
+
+
+def get_spec_cache() -> DeviceSpecCache:
+    """获取进程级的属性定义缓存"""
+    global _spec_cache
+    if _spec_cache is None:
+        with _spec_cache_lock:
+            if _spec_cache is None:
+                _spec_cache = DeviceSpecCache(get_app_path() / 'data' / 'spec_cache.json')
+    return _spec_cache
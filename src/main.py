@@ -33,6 +33,7 @@ from src.utils.config_loader import ConfigLoader
 from src.utils.logger import setup_logger
 from src.utils.path_utils import get_app_path, get_resource_path
 from src.core.database import DatabaseManager
+from src.core.device_profiles import DeviceProfileFactory
 from src.core.monitor import DeviceMonitor
 from src.ui.main_window import MainWindow
 
@@ -69,6 +70,12 @@ def main():
     database = DatabaseManager(str(db_path))
     logger.info(f"数据库初始化完成: {db_path}")
     
+    # 扫描设备配置目录, 之后按型号从缓存获取配置
+    profile_paths = DeviceProfileFactory.scan(
+        hot_reload=config.get('developer.profile_hot_reload', False)
+    )
+    logger.info(f"已发现 {len(profile_paths)} 个设备配置")
+    
     # 初始化监控器
     monitor = DeviceMonitor(config, database)
     logger.info("设备监控器初始化完成")
@@ -141,7 +148,12 @@ def main():
     
     # 运行应用
     logger.info("应用程序界面已启动")
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    
+    # 退出前停止监控并关闭数据库连接
+    monitor.stop_monitor()
+    database.close()
+    sys.exit(exit_code)
 
 
 if __name__ == '__main__':
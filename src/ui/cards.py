@@ -1,187 +1,299 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from PySide6.QtWidgets import (
-    QFrame, QVBoxLayout, QHBoxLayout, QLabel, QWidget, QGridLayout,
-    QSizePolicy, QGraphicsDropShadowEffect
+    QFrame, QVBoxLayout, QHBoxLayout, QLabel, QWidget, QListView,
+    QStyledItemDelegate, QStyle, QAbstractItemView
 )
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QColor, QFont, QCursor
+from PySide6.QtCore import Qt, Signal, QAbstractListModel, QModelIndex, QRect, QRectF, QSize
+from PySide6.QtGui import QColor, QFont, QCursor, QPainter, QPainterPath
 
+from ..utils.logger import get_logger
 
-class DeviceCard(QFrame):
-    """米家风格的设备卡片"""
+logger = get_logger(__name__)
+
+# 卡片尺寸与外边距(外边距内绘制阴影)
+CARD_WIDTH = 200
+CARD_HEIGHT = 160
+CARD_MARGIN = 4
+
+# 设备排序方式: ui.device_list.sort_by -> 排序键
+SORT_KEYS = {
+    'name': lambda device: (device.get('name') or '',),
+    'room': lambda device: (device.get('room_name') or '', device.get('name') or ''),
+    'model': lambda device: (device.get('model') or '', device.get('name') or ''),
+    'online': lambda device: (not device.get('online'), device.get('name') or '')
+}
+
+
+class DeviceListModel(QAbstractListModel):
+    """
+    设备卡片数据模型
+    
+    按 sort_by 排序保存全部设备, 但只向视图暴露已加载的行;
+    滚动到底部时由视图调用 fetchMore 每次再加载 page_size 行
+    """
     
-    clicked = Signal(dict)  # 点击信号，传递设备信息
+    DeviceRole = Qt.ItemDataRole.UserRole + 1
+    OverviewRole = Qt.ItemDataRole.UserRole + 2
     
-    def __init__(self, device: Dict[str, Any], parent=None):
+    def __init__(self, page_size: int = 50, sort_by: str = 'name', parent=None):
         super().__init__(parent)
-        self.device = device
-        self._overview_data = []  # 存储概览数据
+        self.page_size = max(1, page_size)
         
-        self.setFixedSize(200, 160)
-        self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-        self.setObjectName("deviceCard")
+        self._sort_key = SORT_KEYS.get(sort_by)
+        if self._sort_key is None:
+            logger.warning(f"未知的设备排序方式 {sort_by}, 将按名称排序")
+            self._sort_key = SORT_KEYS['name']
         
-        self._setup_style()
-        self._setup_ui()
+        self._devices: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}  # did -> 行号
+        self._overview: Dict[str, list] = {}  # did -> 概览数据
+        self._loaded = 0  # 已暴露给视图的行数
     
-    def _setup_style(self):
-        """设置卡片样式"""
-        self.setStyleSheet("""
-            QFrame#deviceCard {
-                background-color: rgba(255, 255, 255, 0.6);
-                border-radius: 16px;
-                border: none;
-            }
-            QFrame#deviceCard:hover {
-                background-color: rgba(255, 255, 255, 0.65);
-            }
-        """)
-        
-        # 添加阴影效果
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(20)
-        shadow.setColor(QColor(0, 0, 0, 30))
-        shadow.setOffset(0, 4)
-        self.setGraphicsEffect(shadow)
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._loaded
     
-    def _setup_ui(self):
-        """设置UI"""
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(16, 16, 16, 16)
-        layout.setSpacing(8)
-        
-        # 顶部区域：状态指示器
-        top_layout = QHBoxLayout()
-        top_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # 在线状态点
-        self.status_dot = QLabel()
-        self.status_dot.setFixedSize(8, 8)
-        self._update_status_dot()
-        top_layout.addWidget(self.status_dot)
-        top_layout.addStretch()
-        
-        layout.addLayout(top_layout)
-        
-        # 中间区域：实时数据
-        self.data_container = QWidget()
-        self.data_layout = QVBoxLayout(self.data_container)
-        self.data_layout.setContentsMargins(0, 0, 0, 0)
-        self.data_layout.setSpacing(4)
-        
-        # 主数据标签（大字体）
-        self.main_value_label = QLabel("-")
-        self.main_value_label.setStyleSheet("""
-            font-size: 28px;
-            font-weight: bold;
-            color: #1a1a1a;
-        """)
-        self.data_layout.addWidget(self.main_value_label)
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
         
-        # 次要数据标签
-        self.secondary_value_label = QLabel("")
-        self.secondary_value_label.setStyleSheet("""
-            font-size: 14px;
-            color: #666666;
-        """)
-        self.data_layout.addWidget(self.secondary_value_label)
+        device = self._devices[index.row()]
+        if role == self.DeviceRole:
+            return device
+        if role == self.OverviewRole:
+            return self._overview.get(device['did'], [])
+        if role == Qt.ItemDataRole.DisplayRole:
+            return device.get('name', '未知设备')
+        return None
+    
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._loaded < len(self._devices)
+    
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid():
+            return
         
-        layout.addWidget(self.data_container)
-        layout.addStretch()
+        count = min(self.page_size, len(self._devices) - self._loaded)
+        if count <= 0:
+            return
         
-        # 底部区域：设备名称和房间
-        bottom_layout = QVBoxLayout()
-        bottom_layout.setContentsMargins(0, 0, 0, 0)
-        bottom_layout.setSpacing(2)
-        
-        # 设备名称
-        self.name_label = QLabel(self.device.get('name', '未知设备'))
-        self.name_label.setStyleSheet("""
-            font-size: 14px;
-            font-weight: 500;
-            color: #1a1a1a;
-        """)
-        self.name_label.setWordWrap(True)
-        self.name_label.setMaximumHeight(36)
-        bottom_layout.addWidget(self.name_label)
-        
-        # 房间名称
-        room_name = self.device.get('room_name', '')
-        self.room_label = QLabel(room_name if room_name else '')
-        self.room_label.setStyleSheet("""
-            font-size: 12px;
-            color: #999999;
-        """)
-        bottom_layout.addWidget(self.room_label)
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+    
+    def set_devices(self, devices: List[Dict[str, Any]]) -> None:
+        """
+        按设备列表调和模型: 设备集合不变时只通知发生变化的行,
+        有增删时重置模型, 并保留已加载的行数
+        """
+        devices = sorted(
+            (device for device in devices if device.get('did')),
+            key=self._sort_key
+        )
+        rows = {device['did']: row for row, device in enumerate(devices)}
+        
+        if rows == self._rows:
+            changed = [
+                row for row, device in enumerate(devices)
+                if device != self._devices[row]
+            ]
+            self._devices = devices
+            for row in changed:
+                if row < self._loaded:
+                    index = self.index(row)
+                    self.dataChanged.emit(index, index, [self.DeviceRole])
+            return
         
-        layout.addLayout(bottom_layout)
+        self.beginResetModel()
+        self._devices = devices
+        self._rows = rows
+        self._overview = {did: data for did, data in self._overview.items() if did in rows}
+        self._loaded = min(len(devices), max(self._loaded, self.page_size))
+        self.endResetModel()
     
-    def _update_status_dot(self):
-        """更新状态指示点"""
-        is_online = self.device.get('online', False)
-        color = "#4CD964" if is_online else "#cccccc"
-        self.status_dot.setStyleSheet(f"""
-            background-color: {color};
-            border-radius: 4px;
-        """)
+    def set_overview(self, did: str, overview_data: list) -> None:
+        """更新设备概览数据, 只通知已加载的对应行"""
+        row = self._rows.get(did)
+        if row is None or self._overview.get(did) == overview_data:
+            return
+        
+        self._overview[did] = overview_data
+        if row < self._loaded:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [self.OverviewRole])
     
-    def update_device(self, device: Dict[str, Any]):
-        """更新设备信息"""
-        self.device = device
-        self.name_label.setText(device.get('name', '未知设备'))
-        room_name = device.get('room_name', '')
-        self.room_label.setText(room_name if room_name else '')
-        self._update_status_dot()
+    def get_device(self, did: str) -> Optional[Dict[str, Any]]:
+        """获取指定设备的信息"""
+        row = self._rows.get(did)
+        return self._devices[row] if row is not None else None
     
-    def update_realtime_data(self, overview_data: list):
-        """更新实时数据显示
+    def set_online(self, did: str, online: bool) -> None:
+        """更新设备在线状态, 只通知对应行"""
+        row = self._rows.get(did)
+        if row is None or bool(self._devices[row].get('online')) == online:
+            return
         
-        Args:
-            overview_data: 设备概览属性列表，每个元素包含 name, value
-        """
-        self._overview_data = overview_data
+        self._devices[row] = {**self._devices[row], 'online': online}
+        if row < self._loaded:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [self.DeviceRole])
+    
+    def clear(self) -> None:
+        """清空所有设备"""
+        self.beginResetModel()
+        self._devices = []
+        self._rows = {}
+        self._overview = {}
+        self._loaded = 0
+        self.endResetModel()
+
+
+class DeviceCardDelegate(QStyledItemDelegate):
+    """米家风格的设备卡片绘制委托, 只绘制视图中可见的卡片"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
         
-        if not overview_data:
-            self.main_value_label.setText("-")
-            self.secondary_value_label.setText("")
+        self._main_font = self._font(28, QFont.Weight.Bold)
+        self._secondary_font = self._font(14)
+        self._name_font = self._font(14, QFont.Weight.Medium)
+        self._room_font = self._font(12)
+        
+        self._card_color = QColor(255, 255, 255, 153)
+        self._hover_color = QColor(255, 255, 255, 166)
+        self._shadow_color = QColor(0, 0, 0, 10)
+        self._online_color = QColor("#4CD964")
+        self._offline_color = QColor("#cccccc")
+        self._main_text_color = QColor("#1a1a1a")
+        self._secondary_text_color = QColor("#666666")
+        self._room_text_color = QColor("#999999")
+    
+    @staticmethod
+    def _font(pixel_size: int, weight: QFont.Weight = QFont.Weight.Normal) -> QFont:
+        font = QFont()
+        font.setPixelSize(pixel_size)
+        font.setWeight(weight)
+        return font
+    
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(CARD_WIDTH + 2 * CARD_MARGIN, CARD_HEIGHT + 2 * CARD_MARGIN)
+    
+    def paint(self, painter: QPainter, option, index: QModelIndex) -> None:
+        device = index.data(DeviceListModel.DeviceRole)
+        if device is None:
             return
+        overview_data = index.data(DeviceListModel.OverviewRole) or []
+        
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        
+        card = QRectF(option.rect.adjusted(CARD_MARGIN, CARD_MARGIN, -CARD_MARGIN, -CARD_MARGIN))
+        
+        # 阴影: 几层向下偏移的半透明圆角矩形, 代替逐卡片的模糊阴影效果
+        painter.setBrush(self._shadow_color)
+        for spread in (1, 2, 3):
+            painter.drawRoundedRect(
+                card.adjusted(-spread, -spread + 2, spread, spread + 1),
+                16 + spread, 16 + spread
+            )
         
-        # 第一个属性作为主数据
-        main_data = overview_data[0]
-        self.main_value_label.setText(str(main_data.get('value', '-')))
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        path = QPainterPath()
+        path.addRoundedRect(card, 16, 16)
+        painter.fillPath(path, self._hover_color if hovered else self._card_color)
         
-        # 其余属性作为次要数据
-        if len(overview_data) > 1:
-            secondary_parts = [str(d.get('value', '')) for d in overview_data[1:3]]  # 最多显示2个次要数据
-            self.secondary_value_label.setText(' | '.join(secondary_parts))
+        content = card.toRect().adjusted(16, 16, -16, -16)
+        
+        # 顶部区域：在线状态点
+        painter.setBrush(self._online_color if device.get('online') else self._offline_color)
+        painter.drawEllipse(QRect(content.left(), content.top(), 8, 8))
+        
+        # 中间区域：实时数据, 第一个属性作为主数据, 其余最多显示2个次要数据
+        if overview_data:
+            main_text = str(overview_data[0].get('value', '-'))
+            secondary_text = ' | '.join(str(d.get('value', '')) for d in overview_data[1:3])
         else:
-            self.secondary_value_label.setText("")
-    
-    def mousePressEvent(self, event):
-        """鼠标点击事件"""
-        if event.button() == Qt.MouseButton.LeftButton:
-            self.clicked.emit(self.device)
-        super().mousePressEvent(event)
+            main_text, secondary_text = '-', ''
+        
+        painter.setPen(self._main_text_color)
+        painter.setFont(self._main_font)
+        main_rect = QRect(content.left(), content.top() + 16, content.width(), 36)
+        painter.drawText(
+            main_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+            painter.fontMetrics().elidedText(main_text, Qt.TextElideMode.ElideRight, content.width())
+        )
+        
+        if secondary_text:
+            painter.setPen(self._secondary_text_color)
+            painter.setFont(self._secondary_font)
+            secondary_rect = QRect(content.left(), main_rect.bottom() + 4, content.width(), 18)
+            painter.drawText(
+                secondary_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                painter.fontMetrics().elidedText(secondary_text, Qt.TextElideMode.ElideRight, content.width())
+            )
+        
+        # 底部区域：设备名称和房间
+        room_rect = QRect(content.left(), content.bottom() - 15, content.width(), 16)
+        room_name = device.get('room_name', '')
+        if room_name:
+            painter.setPen(self._room_text_color)
+            painter.setFont(self._room_font)
+            painter.drawText(room_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, room_name)
+        
+        painter.setPen(self._main_text_color)
+        painter.setFont(self._name_font)
+        name_rect = QRect(content.left(), room_rect.top() - 38, content.width(), 36)
+        painter.drawText(
+            name_rect,
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom | Qt.TextFlag.TextWordWrap,
+            device.get('name', '未知设备')
+        )
+        
+        painter.restore()
 
 
-class DeviceCardGrid(QWidget):
-    """设备卡片网格容器"""
+class DeviceCardGrid(QListView):
+    """
+    虚拟化的设备卡片网格
+    
+    卡片由委托直接绘制, 不为每个设备创建控件; 视图只绘制可见区域内的卡片,
+    窗口大小改变时按统一的卡片尺寸重新排列, 列数随宽度自动调整
+    """
     
     card_clicked = Signal(dict)  # 卡片点击信号
     
-    def __init__(self, parent=None):
+    def __init__(self, page_size: int = 50, sort_by: str = 'name', parent=None):
         super().__init__(parent)
         
-        self._cards: Dict[str, DeviceCard] = {}  # did -> DeviceCard
-        self._columns = 5  # 默认列数
+        self.device_model = DeviceListModel(page_size, sort_by, self)
+        self.setModel(self.device_model)
+        self.setItemDelegate(DeviceCardDelegate(self))
         
         self._setup_ui()
+        self.clicked.connect(self._on_card_clicked)
     
     def _setup_ui(self):
         """设置UI"""
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setSpacing(4)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WidgetAttribute.WA_Hover)
+        self.viewport().setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        
         # 使用渐变背景模拟米家App风格
         self.setStyleSheet("""
             DeviceCardGrid {
+                border: none;
+                padding: 12px;
                 background: qlineargradient(
                     x1: 0, y1: 0, x2: 0, y2: 1,
                     stop: 0 #87CEEB,
@@ -189,105 +301,51 @@ class DeviceCardGrid(QWidget):
                     stop: 1 #E6E6FA
                 );
             }
+            QScrollBar:vertical {
+                background: rgba(0, 0, 0, 0.1);
+                width: 8px;
+                border-radius: 4px;
+            }
+            QScrollBar::handle:vertical {
+                background: rgba(0, 0, 0, 0.3);
+                border-radius: 4px;
+                min-height: 20px;
+            }
+            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
+                height: 0px;
+            }
         """)
-        
-        self.main_layout = QVBoxLayout(self)
-        self.main_layout.setContentsMargins(20, 20, 20, 20)
-        
-        # 卡片网格
-        self.grid_widget = QWidget()
-        self.grid_widget.setStyleSheet("background: transparent;")
-        self.grid_layout = QGridLayout(self.grid_widget)
-        self.grid_layout.setSpacing(16)
-        self.grid_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
-        
-        self.main_layout.addWidget(self.grid_widget)
-        self.main_layout.addStretch()
-    
-    def set_columns(self, columns: int):
-        """设置列数"""
-        self._columns = max(1, columns)
-        self._relayout_cards()
-    
-    def _relayout_cards(self):
-        """重新布局所有卡片"""
-        # 从布局中移除所有卡片（但不删除）
-        while self.grid_layout.count():
-            item = self.grid_layout.takeAt(0)
-            if item.widget():
-                item.widget().setParent(None)
-        
-        # 重新添加卡片
-        for idx, (did, card) in enumerate(self._cards.items()):
-            row = idx // self._columns
-            col = idx % self._columns
-            self.grid_layout.addWidget(card, row, col)
     
-    def add_device(self, device: Dict[str, Any]) -> DeviceCard:
-        """添加设备卡片"""
-        did = device.get('did')
-        if not did:
-            return None
-        
-        # 如果已存在，更新
-        if did in self._cards:
-            self._cards[did].update_device(device)
-            return self._cards[did]
-        
-        # 创建新卡片
-        card = DeviceCard(device)
-        card.clicked.connect(self._on_card_clicked)
-        
-        self._cards[did] = card
-        
-        # 添加到网格
-        idx = len(self._cards) - 1
-        row = idx // self._columns
-        col = idx % self._columns
-        self.grid_layout.addWidget(card, row, col)
+    def sync_devices(self, devices: List[Dict[str, Any]]) -> None:
+        """
+        按设备列表调和卡片, 设备集合不变时只重绘发生变化的卡片
         
-        return card
-    
-    def remove_device(self, did: str):
-        """移除设备卡片"""
-        if did in self._cards:
-            card = self._cards.pop(did)
-            self.grid_layout.removeWidget(card)
-            card.deleteLater()
-            self._relayout_cards()
+        Args:
+            devices: 设备列表, 按 sort_by 排序后显示
+        """
+        self.device_model.set_devices(devices)
     
     def clear(self):
         """清空所有卡片"""
-        for card in self._cards.values():
-            self.grid_layout.removeWidget(card)
-            card.deleteLater()
-        self._cards.clear()
+        self.device_model.clear()
     
-    def get_card(self, did: str) -> Optional[DeviceCard]:
-        """获取指定设备的卡片"""
-        return self._cards.get(did)
+    def get_device(self, did: str) -> Optional[Dict[str, Any]]:
+        """获取指定设备的信息"""
+        return self.device_model.get_device(did)
     
     def update_device_data(self, did: str, overview_data: list):
         """更新设备实时数据"""
-        card = self._cards.get(did)
-        if card:
-            card.update_realtime_data(overview_data)
+        self.device_model.set_overview(did, overview_data)
     
-    def _on_card_clicked(self, device: Dict[str, Any]):
-        """卡片点击处理"""
-        self.card_clicked.emit(device)
+    def set_device_online(self, did: str, online: bool):
+        """更新设备在线状态指示"""
+        self.device_model.set_online(did, online)
     
-    def resizeEvent(self, event):
-        """窗口大小改变时自动调整列数"""
-        super().resizeEvent(event)
-        # 根据宽度自动计算列数（每个卡片200px + 16px间距）
-        available_width = event.size().width() - 40  # 减去边距
-        card_width = 200 + 16
-        new_columns = max(1, available_width // card_width)
-        
-        if new_columns != self._columns:
-            self._columns = new_columns
-            self._relayout_cards()
+    def _on_card_clicked(self, index: QModelIndex):
+        """卡片点击处理"""
+        device = index.data(DeviceListModel.DeviceRole)
+        if device is not None:
+            self.card_clicked.emit(device)
 
 
 class BaseCard(QFrame):
@@ -316,7 +374,7 @@ class BaseCard(QFrame):
         self.content_layout = QHBoxLayout(self.content_widget)
         self.content_layout.setContentsMargins(0, 10, 0, 0)
         self.layout.addWidget(self.content_widget)
-
+    
     def set_value(self, value: str):
         pass
 
@@ -337,7 +395,7 @@ class InfoCard(BaseCard):
             self.content_layout.addWidget(unit_label)
             
         self.content_layout.addStretch()
-
+    
     def set_value(self, value: str):
         # Remove unit if it's already in the value string to avoid duplication
         if self.unit and value.endswith(self.unit):
@@ -364,7 +422,7 @@ class SwitchCard(BaseCard):
         self.content_layout.addStretch()
         self.content_layout.addWidget(self.status_label)
         self.content_layout.addStretch()
-
+    
     def set_value(self, value: str):
         is_on = value in ["True", "true", "On", "on", "开启", "1"]
         
@@ -22,6 +22,68 @@ class DateAxisItem(pg.AxisItem):
                 strings.append('')
         return strings
 
+class SeriesBuffer:
+    """
+    定长环形缓冲区, 保存一条曲线的 (时间戳, 值)
+    
+    底层数组为容量的两倍, 写到末尾时把现有数据移回开头, 追加为均摊O(1),
+    且 view() 始终返回连续数组, 可直接交给 setData
+    """
+    def __init__(self, capacity=2000):
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity):
+        self.capacity = max(2, int(capacity))
+        self._x = np.empty(self.capacity * 2)
+        self._y = np.empty(self.capacity * 2)
+        self._start = 0
+        self._end = 0
+    
+    def __len__(self):
+        return self._end - self._start
+    
+    @property
+    def last_x(self):
+        return self._x[self._end - 1] if len(self) else None
+    
+    def reset(self, x, y, capacity=None):
+        """替换全部数据, 超出容量时只保留最新的部分"""
+        if capacity and capacity != self.capacity:
+            self._allocate(capacity)
+        x = np.asarray(x, dtype=float)[-self.capacity:]
+        y = np.asarray(y, dtype=float)[-self.capacity:]
+        count = len(x)
+        self._x[:count] = x
+        self._y[:count] = y
+        self._start = 0
+        self._end = count
+    
+    def append(self, x, y):
+        """追加一个点, 超出容量时丢弃最旧的点"""
+        if self._end == len(self._x):
+            count = len(self)
+            self._x[:count] = self._x[self._start:self._end]
+            self._y[:count] = self._y[self._start:self._end]
+            self._start = 0
+            self._end = count
+        
+        self._x[self._end] = x
+        self._y[self._end] = y
+        self._end += 1
+        if len(self) > self.capacity:
+            self._start += 1
+    
+    def trim_before(self, x_min):
+        """丢弃 x_min 之前的点, 保留其前的最后一个点使曲线从窗口左边界开始"""
+        x, _ = self.view()
+        index = int(np.searchsorted(x, x_min, side='right')) - 1
+        if index > 0:
+            self._start += index
+    
+    def view(self):
+        return self._x[self._start:self._end], self._y[self._start:self._end]
+
+
 class ModernPlotItem(pg.PlotWidget):
     """单个属性的现代化图表"""
     def __init__(self, title, color, parent=None):
@@ -57,56 +119,71 @@ class ModernPlotItem(pg.PlotWidget):
         self.setTitle(title, color='#DDDDDD', size='11pt', bold=True)
         
         self.color = QColor(color)
-
-    def set_data(self, timestamps, values, x_range=None, step_mode=False):
-        self.clear()
+        
+        # 曲线与标记只创建一次, 之后的刷新只替换数据
+        self.buffer = SeriesBuffer()
+        self.step_mode = False
+        self._curve = None
+        self._markers = {}  # 标记类型 -> TextItem
+    
+    def set_data(self, timestamps, values, x_range=None, step_mode=False, capacity=None):
+        """替换图表数据"""
+        self.step_mode = step_mode
+        self.buffer.reset(timestamps, values, capacity)
         
         # 设置X轴范围
         if x_range:
             self.setXRange(x_range[0], x_range[1], padding=0)
         
-        if not timestamps or not values:
+        self._render()
+    
+    def append_data(self, timestamp, value, x_range=None, gap_threshold=None):
+        """
+        追加一个实时采样, 只更新现有曲线
+        
+        Args:
+            timestamp: Unix时间戳
+            value: 数值
+            x_range: 新的X轴范围, 窗口之前的点会被丢弃
+            gap_threshold: 与上一个点间隔超过该值(秒)时先插入NaN断点
+        """
+        last_x = self.buffer.last_x
+        if last_x is not None:
+            if timestamp <= last_x:
+                return
+            if gap_threshold is not None and timestamp - last_x > gap_threshold:
+                # 与数据库降采样的断点标记一致
+                self.buffer.append(last_x + 1, np.nan)
+        self.buffer.append(timestamp, value)
+        
+        if x_range:
+            self.buffer.trim_before(x_range[0])
+            self.setXRange(x_range[0], x_range[1], padding=0)
+        
+        self._render()
+    
+    def _render(self):
+        """按缓冲区数据更新曲线和数值标记"""
+        for marker in self._markers.values():
+            marker.hide()
+        
+        x, y = self.buffer.view()
+        if len(x) == 0:
+            if self._curve is not None:
+                self._curve.setData([], [])
             return
-
-        x = np.array(timestamps)
-        y = np.array(values)
         
         # 如果是阶梯模式，预处理数据
-        if step_mode and len(x) > 1:
+        if self.step_mode and len(x) > 1:
             # 创建阶梯数据: (t0, v0), (t1, v0), (t1, v1), (t2, v1)...
-            # 我们需要重复x和y的值来制造直角转折
-            
             # 新的x: t0, t1, t1, t2, t2, t3...
             # 新的y: v0, v0, v1, v1, v2, v2...
-            
-            new_x = []
-            new_y = []
-            
-            for i in range(len(x) - 1):
-                new_x.extend([x[i], x[i+1]])
-                new_y.extend([y[i], y[i]])
-                
-            # 添加最后一个点
-            new_x.append(x[-1])
-            new_y.append(y[-1])
-            
-            x = np.array(new_x)
-            y = np.array(new_y)
+            x = np.repeat(x, 2)[1:]
+            y = np.repeat(y, 2)[:-1]
         
         # 1. 准备样式
         pen = pg.mkPen(color=self.color, width=2.5)
         
-        # 创建渐变填充
-        grad = QLinearGradient(0, 0, 0, 1)
-        grad.setCoordinateMode(QLinearGradient.ObjectBoundingMode)
-        c_top = QColor(self.color)
-        c_top.setAlpha(80)
-        c_bottom = QColor(self.color)
-        c_bottom.setAlpha(5)
-        grad.setColorAt(0, c_top)
-        grad.setColorAt(1, c_bottom)
-        brush = QBrush(grad)
-        
         # 计算填充基准线 (稍微在最小值下面一点，或者0)
         valid_y = y[~np.isnan(y)]
         if len(valid_y) > 0:
@@ -115,59 +192,56 @@ class ModernPlotItem(pg.PlotWidget):
             range_val = max_val - min_val if max_val != min_val else 1.0
             fill_level = min_val - range_val * 0.05
         else:
+            max_val = 1.0
             fill_level = 0
-            
-        # 2. 分段绘制以正确处理填充
-        # 寻找NaN的索引
-        nan_indices = np.where(np.isnan(y))[0]
         
-        # 如果没有NaN，直接绘制
-        if len(nan_indices) == 0:
-            self.plot(x, y, pen=pen, brush=brush, fillLevel=fill_level)
+        # 创建渐变填充
+        # 渐变使用数据坐标, 分段(分块)填充时各段颜色保持一致
+        grad = QLinearGradient(0, max_val, 0, fill_level)
+        c_top = QColor(self.color)
+        c_top.setAlpha(80)
+        c_bottom = QColor(self.color)
+        c_bottom.setAlpha(5)
+        grad.setColorAt(0, c_top)
+        grad.setColorAt(1, c_bottom)
+        brush = QBrush(grad)
+        
+        # 2. 绘制曲线
+        # NaN 处断开, 整条曲线(含各段填充)只用一个绘图项, 重绘开销与断点数量无关
+        if self._curve is None:
+            self._curve = self.plot(x, y, pen=pen, brush=brush, fillLevel=fill_level, connect='finite')
         else:
-            # 有NaN，分段绘制
-            start_idx = 0
-            for nan_idx in nan_indices:
-                if nan_idx > start_idx:
-                    # 绘制这一段
-                    seg_x = x[start_idx:nan_idx]
-                    seg_y = y[start_idx:nan_idx]
-                    self.plot(seg_x, seg_y, pen=pen, brush=brush, fillLevel=fill_level)
-                start_idx = nan_idx + 1
-            
-            # 绘制最后一段
-            if start_idx < len(x):
-                seg_x = x[start_idx:]
-                seg_y = y[start_idx:]
-                self.plot(seg_x, seg_y, pen=pen, brush=brush, fillLevel=fill_level)
+            self._curve.setData(x, y, brush=brush, fillLevel=fill_level)
         
         # 3. 标记最大值和最小值
         # 对于阶梯图，标记可能太多，仅标记最新值
-        if not step_mode and len(valid_y) > 1:
+        if not self.step_mode and len(valid_y) > 1:
             self._add_marker(x, y, np.nanargmax(y), 'max')
             self._add_marker(x, y, np.nanargmin(y), 'min')
         
         # 4. 标记最新值
         if len(y) > 0 and not np.isnan(y[-1]):
             self._add_marker(x, y, -1, 'current')
-
+    
     def _add_marker(self, x, y, index, type_):
-        """添加数值标记"""
+        """添加数值标记, 同类标记复用已有的文本项"""
         ts = x[index]
         val = y[index]
         
-        # 文本标签
-        anchor = (0.5, 1.5) if type_ == 'max' else (0.5, -0.5)
-        if type_ == 'current':
-             anchor = (0, 1) # 最新值放在左上一点
-
-        text = pg.TextItem(
-            text=f"{val:.1f}", 
-            color=self.color, 
-            anchor=anchor
-        )
+        text = self._markers.get(type_)
+        if text is None:
+            # 文本标签
+            anchor = (0.5, 1.5) if type_ == 'max' else (0.5, -0.5)
+            if type_ == 'current':
+                 anchor = (0, 1) # 最新值放在左上一点
+            
+            text = pg.TextItem(color=self.color, anchor=anchor)
+            self.addItem(text)
+            self._markers[type_] = text
+        
+        text.setText(f"{val:.1f}")
         text.setPos(ts, val)
-        self.addItem(text)
+        text.show()
 
 class DeviceChartWidget(QWidget):
     """设备数据图表组件"""
@@ -181,36 +255,37 @@ class DeviceChartWidget(QWidget):
         self.layout.setSpacing(20)
         
         self.charts = []
+        self._charts_by_key = {}  # 属性名 -> 图表, 供增量更新使用
         
         # 配置PyQtGraph全局选项
         pg.setConfigOption('antialias', True)
         
-    def add_chart(self, name: str, timestamps: list, values: list, color: str, x_range: tuple = None, style: str = 'line'):
+    def set_chart(self, key: str, name: str, timestamps, values, color: str,
+                  x_range: tuple = None, style: str = 'line', capacity: int = None):
         """
-        添加一个属性的图表
-        """
-        chart = ModernPlotItem(name, color)
+        添加或更新某个属性的图表
         
-        if not timestamps or not values:
-            # 即使没有数据，如果指定了范围，也应该显示空图表
-            if x_range:
-                chart.set_data([], [], x_range)
-            else:
-                # 没有数据也没有范围，不添加
-                chart.deleteLater()
-                return
-        else:
-            # 确保数据是数值型
-            try:
-                values = [float(v) for v in values]
-                chart.set_data(timestamps, values, x_range, step_mode=(style == 'step'))
-            except (ValueError, TypeError):
-                chart.deleteLater()
-                return
+        图表已存在时复用原有控件和曲线, 只替换数据
+        """
+        chart = self._charts_by_key.get(key)
+        if chart is None:
+            chart = ModernPlotItem(name, color)
+            self._charts_by_key[key] = chart
+            self.charts.append(chart)
+            self._update_layout()
         
-        self.charts.append(chart)
-        self._update_layout()
-            
+        chart.set_data(timestamps, values, x_range, step_mode=(style == 'step'), capacity=capacity)
+        return chart
+    
+    def append_sample(self, key: str, timestamp: float, value: float,
+                      x_range: tuple = None, gap_threshold: float = None) -> bool:
+        """向已有图表追加一个实时采样, 图表不存在时返回False"""
+        chart = self._charts_by_key.get(key)
+        if chart is None:
+            return False
+        chart.append_data(timestamp, value, x_range, gap_threshold)
+        return True
+    
     def _update_layout(self):
         """更新网格布局"""
         count = len(self.charts)
@@ -245,3 +320,4 @@ class DeviceChartWidget(QWidget):
             self.layout.removeWidget(chart)
             chart.deleteLater()
         self.charts = []
+        self._charts_by_key = {}
@@ -9,9 +9,11 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
 
-from ..core.database import DatabaseManager
+from ..core.database import DatabaseManager, utc_text
 from ..core.device_profiles import DeviceProfileFactory
+from ..core.recording import compile_policy
 from ..utils.logger import get_logger
+from ..utils.config_loader import ConfigLoader
 from .charts import DeviceChartWidget
 from .cards import InfoCard, SwitchCard
 
@@ -21,12 +23,20 @@ logger = get_logger(__name__)
 class DeviceDetailDialog(QDialog):
     """设备详情对话框"""
     
-    def __init__(self, device: Dict[str, Any], database: DatabaseManager, parent=None):
+    def __init__(
+        self,
+        device: Dict[str, Any],
+        database: DatabaseManager,
+        parent=None,
+        config: ConfigLoader = None
+    ):
         super().__init__(parent)
         
         self.device = device
         self.database = database
+        self.config = config or ConfigLoader()
         self.profile = DeviceProfileFactory.create_profile(device.get('model', ''))
+        self.latest_properties: Dict[str, Any] = {}
         
         self.init_ui()
         self.load_data()
@@ -136,7 +146,7 @@ class DeviceDetailDialog(QDialog):
         layout.addWidget(self.properties_table)
         
         return widget
-
+    
     def create_charts_tab(self) -> QWidget:
         """创建图表选项卡"""
         widget = QWidget()
@@ -194,9 +204,10 @@ class DeviceDetailDialog(QDialog):
                 self.device = latest_device
                 if hasattr(self, 'info_label'):
                     self._update_basic_info_ui()
-
+            
             # 1. 加载当前属性
             properties = self.database.get_latest_device_properties(self.device['did'])
+            self.latest_properties = properties
             self._update_properties_table(properties)
             self._update_cards(properties)
             
@@ -209,7 +220,61 @@ class DeviceDetailDialog(QDialog):
             self.properties_table.setRowCount(1)
             self.properties_table.setItem(0, 0, QTableWidgetItem(f"加载失败: {e}"))
             self.properties_table.setSpan(0, 0, 1, 4)
-
+    
+    def on_device_update(self, data: Dict[str, Any]) -> None:
+        """
+        处理监控器推送的实时属性, 只追加新采样而不重新查询历史
+        
+        Args:
+            data: device_update 回调数据 {did, device, properties, timestamp}
+        """
+        if data.get('did') != self.device['did']:
+            return
+        
+        properties = data.get('properties') or {}
+        if not properties:
+            return
+        
+        try:
+            timestamp = data.get('timestamp') or datetime.now(timezone.utc).timestamp()
+            updated_at = utc_text(timestamp)
+            for prop_name, value in properties.items():
+                previous = self.latest_properties.get(prop_name, {})
+                self.latest_properties[prop_name] = {
+                    'value': value,
+                    'value_type': previous.get('value_type', '-'),
+                    'timestamp': updated_at
+                }
+            self._update_properties_table(self.latest_properties)
+            self._update_cards(self.latest_properties)
+            
+            if self.charts_tab:
+                self._append_chart_samples(timestamp, properties)
+        except Exception as e:
+            logger.error(f"实时更新设备数据失败: {e}")
+    
+    def _append_chart_samples(self, timestamp: float, properties: Dict[str, Any]) -> None:
+        """向已有图表追加实时采样, 图表窗口随之右移"""
+        hours = self._get_range_hours()
+        x_range = (timestamp - hours * 3600, timestamp)
+        monitor_interval = self.device.get('monitor_interval', 60)
+        
+        for prop_name in self.profile.get_chart_properties():
+            if prop_name not in properties:
+                continue
+            try:
+                value = float(properties[prop_name])
+            except (ValueError, TypeError):
+                continue
+            
+            self.chart_widget.append_sample(
+                prop_name,
+                timestamp,
+                value,
+                x_range=x_range,
+                gap_threshold=self._get_gap_threshold(prop_name, monitor_interval)
+            )
+    
     def _update_properties_table(self, properties: Dict[str, Any]) -> None:
         """更新属性表格"""
         display_props = self.profile.get_display_properties(properties)
@@ -236,21 +301,30 @@ class DeviceDetailDialog(QDialog):
             self.properties_table.setRowCount(1)
             self.properties_table.setItem(0, 0, QTableWidgetItem("暂无属性数据"))
             self.properties_table.setSpan(0, 0, 1, 4)
-
-    def _update_charts(self) -> None:
-        """更新图表数据"""
-        self.chart_widget.clear()
-        
-        # 获取时间范围
+    
+    def _get_range_hours(self) -> int:
+        """当前选择的时间范围(小时)"""
         range_text = self.range_combo.currentText()
-        hours = 24
         if "12" in range_text:
-            hours = 12
-        elif "48" in range_text:
-            hours = 48
-            
+            return 12
+        if "48" in range_text:
+            return 48
+        return 24
+    
+    def _update_charts(self) -> None:
+        """
+        从数据库加载图表数据
+        
+        打开对话框、手动刷新或切换时间范围时调用; 已有图表只替换数据,
+        之后的实时采样由 on_device_update 追加
+        """
+        hours = self._get_range_hours()
+        
         end_time = datetime.now()
         start_time = end_time - timedelta(hours=hours)
+        # 数据库中的属性历史记录使用的是UTC时间
+        end_time_utc = datetime.now(timezone.utc).replace(tzinfo=None)
+        start_time_utc = end_time_utc - timedelta(hours=hours)
         
         # 获取需要绘图的属性配置
         chart_props = self.profile.get_chart_properties()
@@ -259,54 +333,54 @@ class DeviceDetailDialog(QDialog):
         
         # 遍历可能的属性
         monitor_interval = self.device.get('monitor_interval', 60)
-        gap_threshold = monitor_interval * 3 # 超过3倍监控间隔视为断点
+        
+        # 点数不超过配置上限和图表像素宽度, 长时间范围由数据库选择汇总层级并降采样
+        max_points = self.config.get('ui.charts.max_points', 100)
+        plot_width = self.chart_widget.width()
+        if plot_width > 0:
+            max_points = min(max_points, plot_width)
+        # 缓冲区另外容纳一个完整时间窗口的实时采样
+        capacity = max_points + hours * 3600 // max(1, monitor_interval) + 1
         
         for prop_name, config in chart_props.items():
-            # 获取数据
-            history = self.database.get_device_properties_history(
-                self.device['did'], 
-                prop_name, 
-                start_time=start_time,
-                limit=5000  # 增加限制以容纳更多数据
+            timestamps, values = self.database.get_property_series(
+                self.device['did'],
+                prop_name,
+                start_time_utc,
+                end_time_utc,
+                max_points=max_points,
+                gap_threshold=self._get_gap_threshold(prop_name, monitor_interval),
+                sample_interval=monitor_interval
             )
-            
-            timestamps = []
-            values = []
-            
-            if history:
-                has_data = True
-                # 数据按时间正序排列
-                last_ts = None
-                for record in reversed(history):
-                    try:
-                        # 解析时间戳
-                        dt = datetime.fromisoformat(record['timestamp'].replace('Z', '+00:00'))
-                        # 数据库中的属性历史记录使用的是UTC时间
-                        if dt.tzinfo is None:
-                            dt = dt.replace(tzinfo=timezone.utc)
-                        ts = dt.timestamp()
-                        val = float(record['property_value'])
-                        
-                        # 检查是否需要插入断点
-                        if last_ts is not None and (ts - last_ts) > gap_threshold:
-                            timestamps.append(last_ts + 1) # 插入一个微小偏移的时间点
-                            values.append(float('nan'))    # 插入NaN值
-                        
-                        timestamps.append(ts)
-                        values.append(val)
-                        last_ts = ts
-                    except (ValueError, TypeError):
-                        continue
+            has_data = has_data or len(timestamps) > 0
             
             # 即使没有数据，也添加图表(显示空白坐标轴)
-            self.chart_widget.add_chart(
+            self.chart_widget.set_chart(
+                prop_name,
                 name=config['name'],
                 timestamps=timestamps,
                 values=values,
                 color=config['color'],
-                x_range=(start_time.timestamp(), end_time.timestamp())
+                x_range=(start_time.timestamp(), end_time.timestamp()),
+                capacity=capacity
             )
     
+    def _get_gap_threshold(self, prop_name: str, monitor_interval: int) -> float:
+        """
+        计算断点阈值(秒): 相邻记录间隔超过该值时视为数据中断
+        
+        只记录变化的属性按心跳间隔放宽; 没有心跳时无法区分中断与未变化, 不插入断点
+        """
+        gap_threshold = monitor_interval * 3  # 超过3倍监控间隔视为断点
+        
+        policy = compile_policy(self.profile.get_recording_policy(prop_name))
+        if policy:
+            if not policy['heartbeat']:
+                return float('inf')
+            gap_threshold = max(gap_threshold, policy['heartbeat'] + monitor_interval * 2)
+        
+        return gap_threshold
+    
     def _update_cards(self, properties: Dict[str, Any]) -> None:
         """更新卡片数据"""
         if not properties:
@@ -318,7 +392,7 @@ class DeviceDetailDialog(QDialog):
                 # 使用profile格式化值
                 formatted_value = self.profile.format_value(key, value)
                 card.set_value(formatted_value)
-
+    
     def _format_datetime(self, dt_str: str, is_utc: bool = True) -> str:
         """格式化日期时间"""
         if not dt_str or dt_str == '-':
@@ -1,5 +1,6 @@
 """主窗口界面"""
 import sys
+import time
 from datetime import datetime
 from typing import Dict, Any, List
 from pathlib import Path
@@ -13,7 +14,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QTimer, Signal, QThread
 from PySide6.QtGui import QIcon, QAction
 
-from ..core.database import DatabaseManager
+from ..core.database import DatabaseManager, utc_text
 from ..core.monitor import DeviceMonitor
 from ..core.device_profiles import DeviceProfileFactory
 from ..utils.config_loader import ConfigLoader
@@ -47,6 +48,8 @@ class MainWindow(QMainWindow):
     # 信号定义
     device_update_signal = Signal(dict)
     device_offline_signal = Signal(dict)
+    device_online_signal = Signal(dict)
+    monitor_error_signal = Signal(dict)
     status_update_signal = Signal(str)
     
     def __init__(self, config: ConfigLoader, database: DatabaseManager, monitor: DeviceMonitor):
@@ -65,14 +68,25 @@ class MainWindow(QMainWindow):
         # 设备ID到行号的映射缓存
         self._did_to_row: Dict[str, int] = {}
         
+        # 待刷新的实时更新 - 每个设备只保留合并后的最新数据, 按固定间隔统一刷新卡片
+        self._pending_updates: Dict[str, Dict[str, Any]] = {}
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(max(0, int(config.get('performance.ui_update_interval', 1000))))
+        self._update_timer.timeout.connect(self._flush_device_updates)
+        
         # 注册监控回调
         self.monitor.register_callback('device_update', self._on_device_update)
         self.monitor.register_callback('device_offline', self._on_device_offline)
+        self.monitor.register_callback('device_online', self._on_device_online)
         self.monitor.register_callback('property_alert', self._on_property_alert)
+        self.monitor.register_callback('error', self._on_monitor_error)
         
         # 连接信号
         self.device_update_signal.connect(self._handle_device_update)
         self.device_offline_signal.connect(self._handle_device_offline)
+        self.device_online_signal.connect(self._handle_device_online)
+        self.monitor_error_signal.connect(self._handle_monitor_error)
         self.status_update_signal.connect(self._update_status_bar)
         
         self.init_ui()
@@ -153,40 +167,14 @@ class MainWindow(QMainWindow):
         return toolbar
     
     def create_device_tab(self) -> QWidget:
-        """创建设备列表选项卡 - 卡片网格布局"""
-        from PySide6.QtWidgets import QScrollArea
-        
-        # 创建滚动区域
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background: transparent;
-            }
-            QScrollBar:vertical {
-                background: rgba(0, 0, 0, 0.1);
-                width: 8px;
-                border-radius: 4px;
-            }
-            QScrollBar::handle:vertical {
-                background: rgba(0, 0, 0, 0.3);
-                border-radius: 4px;
-                min-height: 20px;
-            }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                height: 0px;
-            }
-        """)
-        
-        # 设备卡片网格
-        self.device_card_grid = DeviceCardGrid()
+        """创建设备列表选项卡 - 虚拟化的卡片网格"""
+        self.device_card_grid = DeviceCardGrid(
+            page_size=self.config.get('ui.device_list.page_size', 50),
+            sort_by=self.config.get('ui.device_list.sort_by', 'name')
+        )
         self.device_card_grid.card_clicked.connect(self.show_device_detail)
         
-        scroll_area.setWidget(self.device_card_grid)
-        
-        return scroll_area
+        return self.device_card_grid
     
     def create_alert_tab(self) -> QWidget:
         """创建报警选项卡"""
@@ -280,41 +268,35 @@ class MainWindow(QMainWindow):
         try:
             self._is_refreshing = True
             devices = self.database.get_all_devices()
+            # 一次查询所有设备的最新属性, 不再逐个设备查询
+            latest_properties = self.database.get_all_latest_device_properties()
             
-            # 清空现有卡片
-            self.device_card_grid.clear()
+            # 只增删变化的卡片, 已有卡片原地更新
+            self.device_card_grid.sync_devices(devices)
             
             # 重建 did 到行号的映射（用于兼容性）
-            self._did_to_row.clear()
+            self._did_to_row = {device['did']: idx for idx, device in enumerate(devices)}
             
-            for idx, device in enumerate(devices):
-                # 缓存 did 到索引的映射
-                self._did_to_row[device['did']] = idx
-                
-                # 添加设备卡片
-                card = self.device_card_grid.add_device(device)
-                
-                # 尝试加载实时数据
-                if card:
-                    overview_data = self._get_device_overview_data(device['did'])
-                    card.update_realtime_data(overview_data)
+            # 用数据库中的最新值重建属性缓存, 之后的实时更新只合并到缓存
+            self._property_cache = {
+                device['did']: latest_properties.get(device['did'], {}) for device in devices
+            }
+            
+            for device in devices:
+                overview_data = self._build_overview_data(device, self._property_cache[device['did']])
+                self.device_card_grid.update_device_data(device['did'], overview_data)
             
             # 更新统计
             self.update_stats_label()
         finally:
             self._is_refreshing = False
     
-    def _get_device_overview_data(self, did: str) -> list:
-        """获取设备概览数据"""
+    def _build_overview_data(self, device: Dict[str, Any], properties: Dict[str, Any]) -> list:
+        """按设备配置从最新属性生成概览数据"""
+        if not properties:
+            return []
+        
         try:
-            device = self.database.get_device(did)
-            if not device:
-                return []
-            
-            properties = self.database.get_latest_device_properties(did)
-            if not properties:
-                return []
-            
             profile = DeviceProfileFactory.create_profile(device.get('model', ''))
             return profile.get_overview_properties(properties)
         except Exception as e:
@@ -537,8 +519,13 @@ class MainWindow(QMainWindow):
     def show_device_detail(self, device: Dict[str, Any]) -> None:
         """显示设备详情"""
         # 使用新的详情对话框
-        dialog = DeviceDetailDialog(device, self.database, self)
-        dialog.exec()
+        dialog = DeviceDetailDialog(device, self.database, self, config=self.config)
+        # 对话框打开期间接收实时数据, 增量更新图表
+        self.device_update_signal.connect(dialog.on_device_update)
+        try:
+            dialog.exec()
+        finally:
+            self.device_update_signal.disconnect(dialog.on_device_update)
     
     def _on_device_update(self, data: Dict[str, Any]) -> None:
         """设备更新回调"""
@@ -548,6 +535,14 @@ class MainWindow(QMainWindow):
         """设备离线回调"""
         self.device_offline_signal.emit(data)
     
+    def _on_device_online(self, data: Dict[str, Any]) -> None:
+        """设备恢复在线回调"""
+        self.device_online_signal.emit(data)
+    
+    def _on_monitor_error(self, data: Dict[str, Any]) -> None:
+        """监控错误回调(云端熔断等)"""
+        self.monitor_error_signal.emit(data)
+    
     def _on_property_alert(self, data: Dict[str, Any]) -> None:
         """属性报警回调"""
         if self.config.get('notification.enabled', True):
@@ -564,36 +559,52 @@ class MainWindow(QMainWindow):
                 )
     
     def _handle_device_update(self, data: Dict[str, Any]) -> None:
-        """处理设备更新信号"""
-        # 更新缓存
+        """处理设备更新信号: 只合并到待刷新缓冲区, 由定时器统一刷新卡片"""
         did = data.get('did')
-        properties = data.get('properties', {})
-        
-        if did and properties:
-            # 更新缓存
-            if did not in self._property_cache:
-                self._property_cache[did] = {}
-            
-            for prop_name, value in properties.items():
-                self._property_cache[did][prop_name] = {
-                    'value': value,
-                    'timestamp': datetime.now().isoformat()
-                }
-        
-        # 更新特定设备的卡片实时数据
         if not did:
             return
         
-        try:
-            # 获取设备概览数据并更新卡片
-            overview_data = self._get_device_overview_data(did)
-            self.device_card_grid.update_device_data(did, overview_data)
-        except Exception as e:
-            logger.error(f"更新设备卡片失败: {e}")
+        pending = self._pending_updates.get(did)
+        if pending is None:
+            self._pending_updates[did] = {
+                'device': data.get('device') or {},
+                'properties': dict(data.get('properties') or {}),
+                'timestamp': data.get('timestamp')
+            }
+        else:
+            # 同一刷新周期内的多次更新合并, 保留每个属性的最新值
+            pending['device'] = data.get('device') or pending['device']
+            pending['properties'].update(data.get('properties') or {})
+            pending['timestamp'] = data.get('timestamp') or pending['timestamp']
+        
+        if not self._update_timer.isActive():
+            self._update_timer.start()
+    
+    def _flush_device_updates(self) -> None:
+        """将缓冲的实时数据合并到属性缓存并刷新对应卡片, 不查询数据库"""
+        pending, self._pending_updates = self._pending_updates, {}
+        
+        for did, update in pending.items():
+            timestamp = utc_text(update['timestamp'] or time.time())
+            cache = self._property_cache.setdefault(did, {})
+            for prop_name, value in update['properties'].items():
+                previous = cache.get(prop_name) or {}
+                cache[prop_name] = {
+                    'value': value,
+                    'value_type': previous.get('value_type'),
+                    'timestamp': timestamp
+                }
+            
+            try:
+                overview_data = self._build_overview_data(update['device'], cache)
+                self.device_card_grid.update_device_data(did, overview_data)
+            except Exception as e:
+                logger.error(f"更新设备卡片失败: {e}")
     
     def _handle_device_offline(self, data: Dict[str, Any]) -> None:
         """处理设备离线信号"""
         device_name = data['device']['name']
+        self.device_card_grid.set_device_online(data['did'], False)
         self.status_update_signal.emit(f"设备 {device_name} 离线")
         
         if self.tray_icon and self.config.get('notification.types.device_offline', True):
@@ -604,6 +615,43 @@ class MainWindow(QMainWindow):
                 3000
             )
     
+    def _handle_device_online(self, data: Dict[str, Any]) -> None:
+        """处理设备恢复在线信号"""
+        device_name = data['device']['name']
+        self.device_card_grid.set_device_online(data['did'], True)
+        self.status_update_signal.emit(f"设备 {device_name} 恢复在线")
+        
+        if self.tray_icon and self.config.get('notification.types.device_online', True):
+            self.tray_icon.showMessage(
+                "设备上线",
+                f"{device_name} 已恢复在线",
+                QSystemTrayIcon.MessageIcon.Information,
+                3000
+            )
+    
+    def _handle_monitor_error(self, data: Dict[str, Any]) -> None:
+        """处理监控错误信号: 云端熔断时提示轮询已暂停"""
+        if data.get('type') != 'circuit_open':
+            self.status_update_signal.emit(data.get('message', '监控出错'))
+            return
+        
+        retry_in = int(data.get('retry_in') or 0)
+        if data.get('kind') == 'auth':
+            message = f"米家账号认证失败, 已暂停轮询 {retry_in} 秒, 请检查登录状态"
+        else:
+            message = f"米家云端请求连续失败, 已暂停轮询 {retry_in} 秒"
+        
+        # 状态栏提示保持到熔断到期
+        self.status_bar.showMessage(message, max(retry_in, 3) * 1000)
+        
+        if self.tray_icon and self.config.get('notification.enabled', True):
+            self.tray_icon.showMessage(
+                "轮询已暂停",
+                message,
+                QSystemTrayIcon.MessageIcon.Warning,
+                3000
+            )
+    
     def _update_status_bar(self, message: str) -> None:
         """更新状态栏"""
         self.status_bar.showMessage(message, 3000)
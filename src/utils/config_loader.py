@@ -104,17 +104,47 @@ class ConfigLoader:
             'mijia': {
                 'auth_file': 'config/mijia_auth.json',
                 'timeout': 10,
-                'retry': 3
+                'retry': 3,
+                'circuit_breaker': {
+                    'failure_threshold': 5,
+                    'reset_timeout': 60,
+                    'max_reset_timeout': 1800
+                }
             },
             'monitor': {
                 'default_interval': 60,
                 'auto_start': True,
-                'worker_threads': 5
+                'worker_threads': 5,
+                'max_batch_size': 50,
+                'batch_window': 200,
+                'availability': {
+                    'failure_threshold': 3,
+                    'flap_window': 3600,
+                    'flap_limit': 4,
+                    'flap_recovery': 3
+                },
+                'backoff': {
+                    'factor': 2,
+                    'max_interval': 3600,
+                    'jitter': 0.2
+                },
+                'adaptive': {
+                    'enabled': False,
+                    'min_interval': 30,
+                    'max_interval': 900,
+                    'budget': 0,
+                    'shrink': 0.5,
+                    'grow': 1.25,
+                    'tolerance': 0.01
+                }
             },
             'database': {
                 'path': 'data/monitor.db',
                 'retention_days': 30,
-                'auto_cleanup': True
+                'auto_cleanup': True,
+                'rollups': {
+                    'retention_days': {'1m': 7, '15m': 90, '1h': 730}
+                }
             },
             'logging': {
                 'level': 'INFO',
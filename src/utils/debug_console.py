@@ -61,6 +61,10 @@ class DebugConsole(threading.Thread):
             self._simulate_detail_window(args)
         elif cmd == 'status':
             self._show_status()
+        elif cmd == 'intervals':
+            self._show_intervals()
+        elif cmd == 'reload':
+            self._reload_profiles(args)
         elif cmd == 'quit':
             print("调试控制台已停止 (主程序继续运行)")
             self.running = False
@@ -74,6 +78,8 @@ class DebugConsole(threading.Thread):
         print("  detail <ID/Idx> - 显示设备详细信息 (JSON)")
         print("  sim <ID/Idx>    - 模拟详情窗口数据")
         print("  status          - 显示系统状态")
+        print("  intervals       - 显示自适应轮询间隔")
+        print("  reload [spec]   - 重新加载设备配置 (spec: 同时清空属性定义缓存)")
         print("  help            - 显示此帮助")
         print("  quit            - 停止调试控制台")
         print()
@@ -234,4 +240,84 @@ class DebugConsole(threading.Thread):
         print(f"  设备总数:   {stats['total_devices']}")
         print(f"  在线设备:   {stats['online_devices']}")
         print(f"  未解决报警: {stats['unresolved_alerts']}")
+
+        metrics = self.monitor.get_metrics()
+        print("\n轮询统计:")
+        print(f"  轮询批次:   {metrics['polls']}")
+        print(f"  轮询设备数: {metrics['devices_polled']}")
+        print(f"  请求属性数: {metrics['properties_requested']}")
+        print(f"  云端请求数: {metrics['api_round_trips']}")
+        print(f"  最近一次:   {metrics['last_poll_properties']} 个属性 / "
+              f"{metrics['last_poll_round_trips']} 次请求")
+        print(f"  跳过重复:   {metrics['skipped_in_flight']} (上次轮询尚未完成)")
+        print(f"  历史采样:   写入 {metrics['samples_recorded']} / "
+              f"按记录策略跳过 {metrics['samples_skipped']}")
+        print(f"  请求失败:   {metrics['poll_errors']} 次 (重试 {metrics['api_retries']} 次)")
+
+        states = {'closed': '正常', 'open': '熔断中', 'half_open': '探测中'}
+        circuit = metrics['circuit']
+        print("\n云端熔断:")
+        print(f"  状态:       {states.get(circuit['state'], circuit['state'])}"
+              + (f", {circuit['retry_in']} 秒后探测" if circuit['state'] == 'open' else ""))
+        print(f"  连续失败:   {circuit['failures']} 次 (最近错误 {circuit['last_error'] or '-'})")
+        print(f"  熔断次数:   {circuit['opened']} / 拒绝请求 {metrics['breaker_rejections']} 次")
+
+        availability = metrics['availability']
+        print("\n在线状态:")
+        print(f"  在线/离线:  {availability['online']} / {availability['offline']} "
+              f"(未确定 {availability['unknown']}, 连续失败中 {availability['failing']})")
+        print(f"  状态切换:   离线 {metrics['offline_transitions']} 次 / "
+              f"恢复在线 {metrics['online_transitions']} 次")
+
+        adaptive = metrics['adaptive']
+        if adaptive:
+            decisions = adaptive['decisions']
+            print("\n自适应调度:")
+            print(f"  轮询频率:   {adaptive['effective_rate_per_minute']} 次/分钟 "
+                  f"(目标 {adaptive['rate_per_minute']}, 预算 {adaptive['budget'] or '不限'}, "
+                  f"间隔放大 {adaptive['budget_scale']}x)")
+            print(f"  上下限:     {adaptive['at_floor']} 个设备在下限 / "
+                  f"{adaptive['at_ceiling']} 个设备在上限 (共 {adaptive['devices']} 个)")
+            print(f"  调整次数:   变化缩短 {decisions['changed']} / 报警缩短 {decisions['alert']} / "
+                  f"平稳延长 {decisions['flat']}")
+
+        writer = metrics['writer']
+        print("\n数据库写入:")
+        print(f"  队列深度:   {writer['queue_depth']}")
+        print(f"  已写入:     {writer['rows_written']} 条 / {writer['flushes']} 次提交")
+        print(f"  最近一次:   {writer['last_flush_rows']} 条, {writer['last_flush_ms']} ms")
+        print(f"  最长耗时:   {writer['max_flush_ms']} ms")
+        print(f"  失败/丢弃:  {writer['failed_flushes']} 次 / {writer['dropped']} 条")
         print()
+
+    def _show_intervals(self):
+        """显示各设备的自适应轮询间隔"""
+        adaptive = self.monitor.adaptive
+        if adaptive is None:
+            print("自适应调度未启用 (monitor.adaptive.enabled)")
+            return
+
+        reasons = {'initial': '初始', 'alert': '报警', 'changed': '变化', 'flat': '平稳'}
+        names = {device['did']: device['name'] for device in self.database.get_all_devices()}
+        decisions = sorted(adaptive.get_decisions(), key=lambda item: item['effective'])
+
+        print(f"\n{'设备':<24} {'间隔(秒)':>8} {'有效间隔':>8}  原因")
+        print("-" * 56)
+        for item in decisions:
+            name = names.get(item['did'], item['did'])[:22]
+            print(f"{name:<24} {item['interval']:>8} {item['effective']:>8}  "
+                  f"{reasons.get(item['reason'], item['reason'])}")
+        print()
+
+    def _reload_profiles(self, args: List[str]):
+        """重新加载设备配置文件, 可选清空属性定义缓存"""
+        from ..core.device_profiles import DeviceProfileFactory
+
+        if args and args[0] == 'spec':
+            # 属性定义将重新从云端获取, 由其生成的属性格式随下面的通知一并失效
+            self.monitor.spec_cache.clear()
+            print("已清空属性定义缓存")
+
+        # 通知监听者(记录策略、属性格式)清除缓存
+        DeviceProfileFactory.reload()
+        print("已重新加载设备配置")